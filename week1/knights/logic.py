@@ -225,6 +225,33 @@ class Biconditional(Sentence):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
+class Constant(Sentence):
+    def __init__(self, value):
+        self.value = bool(value)
+
+    def __eq__(self, other):
+        return isinstance(other, Constant) and self.value == other.value
+
+    def __hash__(self):
+        return hash(("constant", self.value))
+
+    def __repr__(self):
+        return f"Constant({self.value})"
+
+    def evaluate(self, model):
+        return self.value
+
+    def formula(self):
+        return "⊤" if self.value else "⊥"
+
+    def symbols(self):
+        return set()
+
+
+TRUE = Constant(True)
+FALSE = Constant(False)
+
+
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
@@ -261,3 +288,167 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def count_nodes(sentence):
+    """Returns the number of nodes in the logical sentence tree."""
+    if isinstance(sentence, Not):
+        return 1 + count_nodes(sentence.operand)
+    elif isinstance(sentence, And):
+        return 1 + sum(count_nodes(c) for c in sentence.conjuncts)
+    elif isinstance(sentence, Or):
+        return 1 + sum(count_nodes(d) for d in sentence.disjuncts)
+    elif isinstance(sentence, Implication):
+        return (1 + count_nodes(sentence.antecedent)
+                + count_nodes(sentence.consequent))
+    elif isinstance(sentence, Biconditional):
+        return 1 + count_nodes(sentence.left) + count_nodes(sentence.right)
+    return 1
+
+
+def negate(sentence):
+    """Returns the negation of a sentence, without double negations."""
+    if isinstance(sentence, Constant):
+        return Constant(not sentence.value)
+    elif isinstance(sentence, Not):
+        return sentence.operand
+    return Not(sentence)
+
+
+def literals(sentence):
+    """Returns a model of the symbols forced by top-level literal conjuncts."""
+    conjuncts = sentence.conjuncts if isinstance(sentence, And) else [sentence]
+    model = dict()
+    for conjunct in conjuncts:
+        if isinstance(conjunct, Symbol):
+            model[conjunct.name] = True
+        elif isinstance(conjunct, Not) and isinstance(conjunct.operand, Symbol):
+            model[conjunct.operand.name] = False
+    return model
+
+
+def rewrite(sentence, model):
+    """
+    Returns a sentence equivalent to `sentence` under `model`, with symbols
+    in `model` replaced by constants, nested conjunctions and disjunctions
+    flattened, double negations removed and tautologies eliminated.
+    """
+    if isinstance(sentence, Symbol):
+        if sentence.name in model:
+            return Constant(model[sentence.name])
+        return sentence
+
+    elif isinstance(sentence, Not):
+        return negate(rewrite(sentence.operand, model))
+
+    elif isinstance(sentence, (And, Or)):
+        # Constant that absorbs the whole connective, and its identity
+        absorbing = FALSE if isinstance(sentence, And) else TRUE
+        identity = negate(absorbing)
+        kind = type(sentence)
+        operands = (sentence.conjuncts if kind is And
+                    else sentence.disjuncts)
+
+        flat = []
+        for operand in operands:
+            operand = rewrite(operand, model)
+            parts = ((operand.conjuncts if kind is And else operand.disjuncts)
+                     if isinstance(operand, kind) else [operand])
+            for part in parts:
+                if part == absorbing:
+                    return absorbing
+                if part == identity or part in flat:
+                    continue
+                flat.append(part)
+
+        # x ∧ ¬x is a contradiction, x ∨ ¬x a tautology
+        for part in flat:
+            if negate(part) in flat:
+                return absorbing
+
+        if len(flat) == 0:
+            return identity
+        elif len(flat) == 1:
+            return flat[0]
+        return kind(*flat)
+
+    elif isinstance(sentence, Implication):
+        antecedent = rewrite(sentence.antecedent, model)
+        consequent = rewrite(sentence.consequent, model)
+        if antecedent == FALSE or consequent == TRUE or antecedent == consequent:
+            return TRUE
+        elif antecedent == TRUE:
+            return consequent
+        elif consequent == FALSE:
+            return negate(antecedent)
+        return Implication(antecedent, consequent)
+
+    elif isinstance(sentence, Biconditional):
+        left = rewrite(sentence.left, model)
+        right = rewrite(sentence.right, model)
+        if left == right:
+            return TRUE
+        elif negate(left) == right:
+            return FALSE
+        elif isinstance(left, Constant):
+            return right if left.value else negate(right)
+        elif isinstance(right, Constant):
+            return left if right.value else negate(left)
+        return Biconditional(left, right)
+
+    return sentence
+
+
+def propagate(sentence, model):
+    """
+    Extends `model` with the symbols forced by top-level literal conjuncts
+    of `sentence` until nothing new is learned. Returns the rewritten
+    sentence, which is FALSE if `model` contradicts it.
+    """
+    result = rewrite(sentence, model)
+    while result != FALSE:
+        learned = {
+            name: value for name, value in literals(result).items()
+            if name not in model
+        }
+        if not learned:
+            break
+        model.update(learned)
+        result = rewrite(sentence, model)
+    return result
+
+
+def simplify(sentence, model=None):
+    """
+    Returns a tuple (residual, forced) where `forced` maps each symbol the
+    sentence forces to its value and `residual` is the rest of the sentence
+    under `model` and `forced`, so that `sentence` is equivalent to the
+    literals of `forced` together with `residual`.
+
+    Symbols assigned in `model` are replaced by constants. Symbols forced by
+    the sentence itself are propagated the same way until nothing new is
+    learned, and no longer appear in the residual. A symbol is forced if it
+    is a top-level literal conjunct, or if assuming the opposite value
+    leads, by propagation, to a contradiction.
+    """
+    model = dict(model or {})
+    known = set(model)
+
+    result = propagate(sentence, model)
+    probing = True
+    while probing and result != FALSE:
+        probing = False
+        for name in sorted(result.symbols()):
+            for value in (True, False):
+                if propagate(sentence, {**model, name: value}) == FALSE:
+                    model[name] = not value
+                    result = propagate(sentence, model)
+                    probing = True
+                    break
+            if probing:
+                break
+
+    forced = {
+        name: value for name, value in model.items() if name not in known
+    }
+    return result, forced
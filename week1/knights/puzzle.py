@@ -99,8 +99,18 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            simplified, forced = simplify(knowledge)
+            print(f"    Nodes: {count_nodes(knowledge)} -> "
+                  f"{count_nodes(simplified)}, "
+                  f"Symbols: {len(knowledge.symbols())} -> "
+                  f"{len(simplified.symbols())}")
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                # Forced symbols are answered without checking any models
+                if symbol.name in forced:
+                    entailed = forced[symbol.name] or simplified == FALSE
+                else:
+                    entailed = model_check(simplified, symbol)
+                if entailed:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,113 @@
+import random
+import sys
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence
+
+SIZES = [8, 16, 32, 64, 128]
+DENSITY = 0.15
+
+# (height, width, mines, games) for the guessing benchmark
+GAMES = [(8, 8, 8, 500), (16, 16, 40, 200), (16, 30, 99, 100)]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [seed]")
+    random.seed(int(sys.argv[1]) if len(sys.argv) == 2 else 0)
+
+    print(f"{'board':>9} {'sentences':>10} {'marks':>7} {'us/mark':>8}")
+    for size in SIZES:
+        sentences, marks, elapsed = benchmark_marks(size, size, DENSITY)
+        print(f"{size:>4}x{size:<4} {sentences:>10} {marks:>7} "
+              f"{1e6 * elapsed / marks:>8.2f}")
+
+    print()
+    print(f"{'board':>9} {'mines':>6} {'guesser':>8} {'wins':>9} "
+          f"{'guesses':>8} {'ms/guess':>9}")
+    for height, width, mines, games in GAMES:
+        for best in (False, True):
+            wins, guesses, elapsed = benchmark_guesses(
+                height, width, mines, games, best
+            )
+            print(f"{height:>4}x{width:<4} {mines:>6} "
+                  f"{'best' if best else 'random':>8} "
+                  f"{wins:>4}/{games:<4} {guesses:>8} "
+                  f"{1e3 * elapsed / max(guesses, 1):>9.3f}")
+
+
+def benchmark_marks(height, width, density):
+    """
+    Fill an AI's knowledge base with one sentence for every third
+    safe cell of a random board, then mark every other cell as a mine
+    or as safe according to the board.
+
+    Return the number of sentences before marking, the number of marks
+    made, and the total time spent marking.
+    """
+    game = Minesweeper(height, width, int(density * height * width))
+    ai = MinesweeperAI(height, width)
+
+    # Reveal a sparse lattice of cells without triggering inference,
+    # so that every mark below has to update a populated knowledge base
+    revealed = set()
+    for i in range(1, height, 3):
+        for j in range(1, width, 3):
+            if not game.is_mine((i, j)):
+                revealed.add((i, j))
+    for cell in revealed:
+        ai.moves_made.add(cell)
+        ai.mark_safe(cell)
+    for cell in revealed:
+        ai.add_sentence(Sentence(ai.neighbors(cell), game.nearby_mines(cell)))
+    ai.pending.clear()
+    sentences = len(ai.knowledge)
+
+    cells = [
+        (i, j) for i in range(height) for j in range(width)
+        if (i, j) not in revealed
+    ]
+    start = time.perf_counter()
+    for cell in cells:
+        if game.is_mine(cell):
+            ai.mark_mine(cell)
+        else:
+            ai.mark_safe(cell)
+    elapsed = time.perf_counter() - start
+
+    return sentences, len(cells), elapsed
+
+
+def benchmark_guesses(height, width, mines, games, best):
+    """
+    Play `games` games, guessing with `make_best_guess` if `best` is True
+    and with `make_random_move` otherwise whenever no safe move is known.
+
+    Return the number of games won, the number of guesses made, and the
+    total time spent choosing guesses.
+    """
+    wins = 0
+    guesses = 0
+    elapsed = 0
+    for _ in range(games):
+        game = Minesweeper(height, width, mines)
+        ai = MinesweeperAI(height, width, mines)
+        while True:
+            move = ai.make_safe_move()
+            if move is None:
+                start = time.perf_counter()
+                move = ai.make_best_guess() if best else ai.make_random_move()
+                if move is not None:
+                    elapsed += time.perf_counter() - start
+                    guesses += 1
+            if move is None:
+                wins += 1
+                break
+            if game.is_mine(move):
+                break
+            ai.add_knowledge(move, game.nearby_mines(move))
+    return wins, guesses, elapsed
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,20 @@
+import functools
 import itertools
+import math
 import random
 
+import numpy as np
+
+# Largest number of memoized states before exact counting gives up
+EXACT_LIMIT = 50000
+
+# Number of weighted samples drawn for components too large to count
+GUESS_SAMPLES = 2000
+
+# Largest ratio of board cells to cells no sentence mentions at which a
+# guess among the latter is found by drawing random cells
+UNMENTIONED_RATIO = 64
+
 
 class Minesweeper():
     """
@@ -12,23 +26,22 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Place mines on a random choice of distinct cells, drawn from a
+        # generator seeded by `random` so that random.seed still applies
+        rng = np.random.default_rng(random.getrandbits(64))
+        positions = rng.permutation(height * width)[:mines]
+        self.board = np.zeros((height, width), dtype=bool)
+        self.board.flat[positions] = True
+        self.mines = {divmod(position, width) for position in positions.tolist()}
+
+        # Count the mines around every cell at once by summing the nine
+        # shifted copies of the zero-padded board (a 3x3 convolution)
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = sum(
+            padded[di:di + height, dj:dj + width]
+            for di in range(3) for dj in range(3)
+        ) - self.board
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -50,7 +63,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i, j])
 
     def nearby_mines(self, cell):
         """
@@ -59,23 +72,8 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        i, j = cell
+        return int(self.counts[i, j])
 
     def won(self):
         """
@@ -125,50 +123,225 @@ class Sentence():
         Updates internal knowledge representation given the fact that
         a cell is known to be a mine.
         """
-        if cell not in self.cells:
-            return
-
-        new_cells = set()
-        
-        count = self.count
-        for acell in self.cells:
-            if acell == cell:
-                count -= 1
-                continue
-            else:
-                new_cells.add(acell)
-
-        self.cells = new_cells
-        self.count = count
+        if cell in self.cells:
+            self.cells.remove(cell)
+            self.count -= 1
 
     def mark_safe(self, cell):
         """
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if cell not in self.cells:
-            return 
+        self.cells.discard(cell)
 
-        new_cells = set()
 
-        for acell in self.cells:
-            if acell == cell:
-                continue
-            new_cells.add(acell)
+def constraint_components(sentences):
+    """
+    Split `sentences` into groups that share no cells with one another.
+
+    Return a list of (cells, sentences) pairs, one per group, where
+    `cells` lists the cells of the group in breadth-first order, so that
+    each sentence spans only a few consecutive positions.
+    """
+    containing = dict()
+    for sentence in sentences:
+        for cell in sentence.cells:
+            containing.setdefault(cell, []).append(sentence)
+
+    components = []
+    seen = set()
+    for start in containing:
+        if start in seen:
+            continue
+        seen.add(start)
+        cells = [start]
+        group = []
+        grouped = set()
+        for cell in cells:
+            for sentence in containing[cell]:
+                if id(sentence) in grouped:
+                    continue
+                grouped.add(id(sentence))
+                group.append(sentence)
+                for other in sorted(sentence.cells):
+                    if other not in seen:
+                        seen.add(other)
+                        cells.append(other)
+        components.append((cells, group))
+    return components
+
+
+class TooManyStates(Exception):
+    pass
+
+
+class Component():
+    """
+    Mine configurations of a group of frontier cells and the sentences
+    constraining them. Cells are visited in order; a sentence is "active"
+    at a position once some but not all of its cells have been visited.
+    """
+
+    def __init__(self, cells, sentences):
+        self.cells = cells
+        self.sentences = sentences
+        position = {cell: i for i, cell in enumerate(cells)}
+        n = len(cells)
+
+        # Sentences containing each cell, and sentences active at each cell
+        self.containing = [[] for _ in range(n)]
+        self.active = [[] for _ in range(n)]
+
+        # Number of cells of each sentence after each of its positions
+        self.later = []
+
+        for s, sentence in enumerate(sentences):
+            span = sorted(position[cell] for cell in sentence.cells)
+            for k, i in enumerate(span):
+                self.containing[i].append(s)
+            self.later.append({i: len(span) - k - 1 for k, i in enumerate(span)})
+            for i in range(span[0] + 1, span[-1] + 1):
+                self.active[i].append(s)
+
+    def assign(self, need, i, value):
+        """
+        Assign `value` to cell `i`, updating the mines each sentence still
+        needs. Return False if some sentence can no longer be satisfied.
+        """
+        feasible = True
+        for s in self.containing[i]:
+            need[s] -= value
+            if need[s] < 0 or need[s] > self.later[s][i]:
+                feasible = False
+        return feasible
+
+    def unassign(self, need, i, value):
+        for s in self.containing[i]:
+            need[s] += value
+
+    def count(self, limit=EXACT_LIMIT):
+        """
+        Count the mine configurations of the component exactly.
+
+        Return a dictionary mapping a number of mines `k` to a pair
+        (solutions, mines) where `solutions` is the number of
+        configurations with `k` mines and `mines[i]` how many of them
+        place a mine on cell `i`. Raise TooManyStates if more than
+        `limit` states would need to be memoized.
+        """
+        need = [sentence.count for sentence in self.sentences]
+        memo = dict()
+        n = len(self.cells)
+
+        def solve(i):
+            if i == n:
+                return {0: (1, [])}
+            key = (i, tuple(need[s] for s in self.active[i]))
+            if key in memo:
+                return memo[key]
+            if len(memo) >= limit:
+                raise TooManyStates
+
+            result = dict()
+            for value in (0, 1):
+                if self.assign(need, i, value):
+                    for k, (solutions, mines) in solve(i + 1).items():
+                        mines = [value * solutions] + mines
+                        if k + value in result:
+                            total, other = result[k + value]
+                            mines = [a + b for a, b in zip(mines, other)]
+                            solutions += total
+                        result[k + value] = (solutions, mines)
+                self.unassign(need, i, value)
+
+            memo[key] = result
+            return result
+
+        return solve(0)
+
+    def sample(self, samples=GUESS_SAMPLES):
+        """
+        Estimate the same dictionary as `count` by sequential importance
+        sampling: each cell takes a value chosen uniformly among those
+        keeping every sentence satisfiable, and each configuration is
+        weighted by the number of choices that led to it.
+        """
+        result = dict()
+        n = len(self.cells)
+        for _ in range(samples):
+            need = [sentence.count for sentence in self.sentences]
+            weight = 1
+            values = []
+            for i in range(n):
+                options = []
+                for value in (0, 1):
+                    if self.assign(need, i, value):
+                        options.append(value)
+                    self.unassign(need, i, value)
+                if not options:
+                    break
+                value = random.choice(options)
+                self.assign(need, i, value)
+                weight *= len(options)
+                values.append(value)
+            else:
+                k = sum(values)
+                total, mines = result.get(k, (0, [0] * n))
+                result[k] = (
+                    total + weight,
+                    [m + weight * v for m, v in zip(mines, values)]
+                )
+        return result
+
+    def configurations(self):
+        """
+        Count the component's configurations exactly if that is cheap
+        enough, otherwise estimate them by sampling.
+        """
+        try:
+            return self.count()
+        except (TooManyStates, RecursionError):
+            return self.sample()
+
+
+def convolve(a, b):
+    """
+    Combine two dictionaries mapping a number of mines to a number of
+    configurations into the distribution of their sum.
+    """
+    result = dict()
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+def scaled(counts):
+    """
+    Divide a dictionary mapping a number of mines to a number of
+    configurations by its largest count, so that counts too large for a
+    float can be weighed by floats.
+    """
+    largest = max(counts.values())
+    if not largest:
+        return counts
+    return {k: x / largest for k, x in counts.items()}
 
-        self.cells = new_cells
 
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -176,26 +349,77 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true, keyed by their cells
+        self.knowledge = dict()
+
+        # Keys of the sentences that mention each cell
+        self.index = dict()
+
+        # Keys of sentences that changed and must be re-examined
+        self.pending = set()
+
+    def neighbors(self, cell):
+        """
+        Returns a tuple of the cells within one row and column of `cell`,
+        not including the cell itself, computed from the board bounds so
+        that no per-cell table is kept for large boards.
+        """
+        i, j = cell
+        return tuple(
+            (k, l)
+            for k in range(max(i - 1, 0), min(i + 2, self.height))
+            for l in range(max(j - 1, 0), min(j + 2, self.width))
+            if (k, l) != cell
+        )
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base and queues it for inference.
+        Empty sentences and sentences already known are dropped.
+        """
+        if not sentence.cells:
+            return
+        key = frozenset(sentence.cells)
+        if key in self.knowledge:
+            return
+        self.knowledge[key] = sentence
+        for cell in key:
+            self.index.setdefault(cell, set()).add(key)
+        self.pending.add(key)
+
+    def remove_sentence(self, key):
+        """
+        Removes the sentence with cells `key` from the knowledge base
+        and returns it.
+        """
+        sentence = self.knowledge.pop(key)
+        for cell in key:
+            self.index[cell].discard(key)
+        return sentence
 
     def mark_mine(self, cell):
         """
-        Marks a cell as a mine, and updates all knowledge
-        to mark that cell as a mine as well.
+        Marks a cell as a mine, and updates the sentences
+        containing that cell, found through the cell index, to mark
+        it as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        for key in list(self.index.get(cell, ())):
+            sentence = self.remove_sentence(key)
             sentence.mark_mine(cell)
+            self.add_sentence(sentence)
 
     def mark_safe(self, cell):
         """
-        Marks a cell as safe, and updates all knowledge
-        to mark that cell as safe as well.
+        Marks a cell as safe, and updates the sentences
+        containing that cell, found through the cell index, to mark
+        it as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        for key in list(self.index.get(cell, ())):
+            sentence = self.remove_sentence(key)
             sentence.mark_safe(cell)
+            self.add_sentence(sentence)
 
     def add_knowledge(self, cell, count):
         """
@@ -218,58 +442,61 @@ class MinesweeperAI():
         # 2) Mark cell as as safe
         self.mark_safe(cell)
 
-        # 3) Add sentence based on the value of the current cell
-        i , j = cell
+        # 3) Add sentence about the neighbours whose state is still unknown
         neighbours = set()
+        for neighbour_cell in self.neighbors(cell):
+            if neighbour_cell in self.mines:
+                count -= 1
+            elif neighbour_cell not in self.safes:
+                neighbours.add(neighbour_cell)
 
-        for row in range(i - 1, i + 2):
-            if 0 <= row <= 7:
-                for col in range(j -1, j + 2):
-                    if 0 <= col <=7:
-                        neighbour_cell = row, col
-                        if neighbour_cell not in self.moves_made:
-                            neighbours.add(neighbour_cell)
-        
-        new_sentence = Sentence(cells=neighbours, count=count)
-        self.knowledge.append(new_sentence)
-
-        # 4) Mark any additional cells as safe/mines
-
-        for sentence in self.knowledge:
-            for cell in sentence.cells:
-                if cell in sentence.known_mines():
-                    self.mark_mine(cell)
-                if cell in sentence.known_safes():
-                    self.mark_safe(cell)
-        
-        # 5) Add new knowledge inferred from new sentences
-        # Keep in mind that every time a new knowledge is added, more new knowledge can be inferred
-        new_knowledge = []
-
-        for sentence in self.knowledge:
-            set1 = sentence.cells
-            count1 = sentence.count
-
-            for other_sentence in self.knowledge:
-                set2 = other_sentence.cells
+        self.add_sentence(Sentence(cells=neighbours, count=count))
 
-                if set1 == set2:
-                    continue
+        # 4) and 5) Propagate until no sentence changes any more
+        self.infer()
 
-                count2 = other_sentence.count
+    def infer(self):
+        """
+        Re-examines every pending sentence until a fixpoint is reached.
 
-                # Mind that even empty set are added to knowledge {}=0
-                # when all neighbours have been known for a cell
-                # and empty cells are subsets of all set
-                # avoid iterating over empty set, so that they don't add further empty sets
+        A pending sentence whose cells are all mines or all safe is
+        resolved by marking them, which in turn queues every sentence
+        sharing those cells. Otherwise it is compared only with the
+        sentences it overlaps, found through the cell index, and the
+        difference of any subset pair is added as a new sentence.
+        """
+        while self.pending:
+            key = self.pending.pop()
+            sentence = self.knowledge.get(key)
+            if sentence is None:
+                continue
 
-                if len(set2) != 0 and set2.issubset(set1):
-                    new_cells = set1 - set2
-                    new_count = count1 - count2
-                    new_knowledge.append(Sentence(new_cells, new_count))
+            # 4) Mark cells as safe/mines if the sentence settles them
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
+            if mines or safes:
+                for cell in list(mines):
+                    self.mark_mine(cell)
+                for cell in list(safes):
+                    self.mark_safe(cell)
+                continue
 
-        self.knowledge.extend(new_knowledge)
-        
+            # 5) Infer new sentences from overlapping subset/superset pairs
+            overlapping = set()
+            for cell in key:
+                overlapping |= self.index[cell]
+            overlapping.discard(key)
+
+            for other_key in overlapping:
+                other = self.knowledge[other_key]
+                if other_key < key:
+                    self.add_sentence(
+                        Sentence(key - other_key, sentence.count - other.count)
+                    )
+                elif key < other_key:
+                    self.add_sentence(
+                        Sentence(other_key - key, other.count - sentence.count)
+                    )
 
     def make_safe_move(self):
         """
@@ -298,10 +525,147 @@ class MinesweeperAI():
                 return
 
             i = random.randint(0, self.height - 1)
-            j = random.randint(0, self.height -1)
+            j = random.randint(0, self.width - 1)
             if (i, j) in self.moves_made:
                 continue
             if (i, j) in self.mines:
                 continue
             return (i, j)
-            
+
+    def mine_probabilities(self):
+        """
+        Returns a tuple (probabilities, rest, size) where `probabilities`
+        maps every cell mentioned by a sentence, and every safe cell not
+        yet chosen, to the probability that it is a mine, and `rest` is
+        the probability shared by the `size` other cells that have not been
+        chosen and are not known to be mines, or None if there are none.
+
+        The knowledge base is split into independent components and the
+        mine configurations of each are counted. If the total number of
+        mines is known, configurations are weighted by the number of ways
+        the remaining mines fit in the cells no sentence mentions.
+        """
+        probabilities = {
+            cell: 0 for cell in self.safes if cell not in self.moves_made
+        }
+
+        components = [
+            (Component(cells, sentences).configurations(), cells)
+            for cells, sentences in constraint_components(
+                self.knowledge.values()
+            )
+        ]
+        constrained = {cell for _, cells in components for cell in cells}
+        totals = [
+            {k: solutions for k, (solutions, _) in counts.items()}
+            for counts, _ in components
+        ]
+
+        # Cells no sentence mentions, counted rather than listed: every
+        # move made is marked safe, and sentences only mention cells not
+        # yet known to be safe or mines
+        size = (self.height * self.width - len(self.mines) - len(self.safes)
+                - len(constrained))
+
+        # Number of ways to place the remaining mines outside the
+        # components, given `k` mines inside them, relative to the most
+        # numerous placement any `k` allows so that it fits in a float
+        if self.total_mines is not None:
+            left = self.total_mines - len(self.mines)
+            most = sum(max(total) for total in totals)
+            reference = min(max(size // 2, left - most, 0), left, size)
+
+            def log_comb(r):
+                return (math.lgamma(size + 1) - math.lgamma(r + 1)
+                        - math.lgamma(size - r + 1))
+
+            @functools.lru_cache(maxsize=None)
+            def ways(k):
+                if not 0 <= left - k <= size:
+                    return 0
+                return math.exp(log_comb(left - k) - log_comb(reference))
+        else:
+            def ways(k):
+                return 1
+
+        for c, (counts, cells) in enumerate(components):
+            others = {0: 1}
+            for d, total in enumerate(totals):
+                if d != c:
+                    others = convolve(others, total)
+            weights = {
+                k: sum(x * ways(k + j) for j, x in scaled(others).items())
+                for k in counts
+            }
+            norm = sum(counts[k][0] * weights[k] for k in counts)
+            if norm == 0:
+                weights = {k: 1 for k in counts}
+                norm = sum(counts[k][0] for k in counts)
+            for i, cell in enumerate(cells):
+                probabilities[cell] = sum(
+                    counts[k][1][i] * weights[k] for k in counts
+                ) / norm
+
+        rest = None
+        if size > 0:
+            combined = {0: 1}
+            for total in totals:
+                combined = convolve(combined, total)
+            combined = scaled(combined)
+            norm = sum(x * ways(k) for k, x in combined.items())
+            if self.total_mines is not None and norm:
+                expected = sum(
+                    x * ways(k) * (left - k) for k, x in combined.items()
+                ) / norm
+                rest = expected / size
+            elif constrained:
+                rest = sum(probabilities[cell] for cell in constrained) / len(constrained)
+            else:
+                rest = 0.5
+
+        return probabilities, rest, size
+
+    def unmentioned_cell(self, size):
+        """
+        Returns a random cell, out of the `size` cells that have not been
+        chosen, are not known to be safe or mines and are not mentioned by
+        any sentence.
+        """
+        def unmentioned(cell):
+            return (cell not in self.safes and cell not in self.mines
+                    and not self.index.get(cell))
+
+        # Draw cells at random while such cells are common, and list them
+        # only when they are too rare to find that way
+        if size * UNMENTIONED_RATIO >= self.height * self.width:
+            while True:
+                cell = (random.randrange(self.height),
+                        random.randrange(self.width))
+                if unmentioned(cell):
+                    return cell
+        return random.choice([
+            (i, j) for i in range(self.height) for j in range(self.width)
+            if unmentioned((i, j))
+        ])
+
+    def make_best_guess(self):
+        """
+        Returns the cell least likely to be a mine among cells that have
+        not already been chosen and are not known to be mines, breaking
+        ties at random. Returns None if there is no such cell.
+        """
+        probabilities, rest, size = self.mine_probabilities()
+        if not probabilities and rest is None:
+            return None
+        lowest = min(probabilities.values(), default=1)
+        if rest is not None:
+            lowest = min(lowest, rest)
+        tied = [
+            cell for cell, p in probabilities.items() if p <= lowest + 1e-9
+        ]
+
+        # Every cell no sentence mentions is tied at `rest`
+        if rest is not None and rest <= lowest + 1e-9:
+            if random.randrange(len(tied) + size) >= len(tied):
+                return self.unmentioned_cell(size)
+        return random.choice(tied)
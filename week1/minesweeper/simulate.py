@@ -0,0 +1,143 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Points of a game, as fractions of its moves, at which the size of the
+# knowledge base is reported
+CHECKPOINTS = [0.1, 0.25, 0.5, 0.75, 1.0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play headless Minesweeper games with MinesweeperAI."
+    )
+    parser.add_argument("-n", "--games", type=int, default=100,
+                        help="games to play per board configuration")
+    parser.add_argument("-s", "--size", type=parse_size, action="append",
+                        help="board size as HEIGHTxWIDTH (repeatable)")
+    parser.add_argument("-d", "--density", type=float, action="append",
+                        help="fraction of cells that are mines (repeatable)")
+    parser.add_argument("-g", "--guess", choices=["best", "random"],
+                        default="best", help="move to make when none is safe")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = args.size or [(8, 8), (16, 16), (16, 30)]
+    densities = args.density or [0.15]
+
+    with multiprocessing.Pool(args.workers) as pool:
+        for height, width in sizes:
+            for density in densities:
+                mines = max(1, round(density * height * width))
+                jobs = [
+                    (height, width, mines, args.guess, args.seed + game)
+                    for game in range(args.games)
+                ]
+                start = time.perf_counter()
+                results = pool.map(play, jobs)
+                elapsed = time.perf_counter() - start
+                report(height, width, mines, results, elapsed)
+
+
+def parse_size(size):
+    """
+    Parse a board size of the form HEIGHTxWIDTH into a tuple of integers.
+    """
+    try:
+        height, width = (int(n) for n in size.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid board size {size!r}")
+    return height, width
+
+
+def play(job):
+    """
+    Play a single game and return a dictionary of statistics about it:
+        - `won`: True if every safe cell was revealed without hitting a mine
+        - `moves`: the number of cells revealed
+        - `guesses`: the number of moves made with no known safe cell
+        - `inference`: time spent in `add_knowledge`
+        - `elapsed`: total time spent playing
+        - `knowledge`: size of the knowledge base after each move
+    """
+    height, width, mines, guess, seed = job
+    random.seed(seed)
+
+    start = time.perf_counter()
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+
+    stats = {
+        "won": False,
+        "moves": 0,
+        "guesses": 0,
+        "inference": 0,
+        "knowledge": []
+    }
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            if guess == "best":
+                move = ai.make_best_guess()
+            else:
+                move = ai.make_random_move()
+            if move is not None:
+                stats["guesses"] += 1
+        if move is None:
+            stats["won"] = True
+            break
+        if game.is_mine(move):
+            break
+
+        nearby = game.nearby_mines(move)
+        inference_start = time.perf_counter()
+        ai.add_knowledge(move, nearby)
+        stats["inference"] += time.perf_counter() - inference_start
+        stats["moves"] += 1
+        stats["knowledge"].append(len(ai.knowledge))
+
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+
+def report(height, width, mines, results, elapsed):
+    """
+    Print aggregate statistics of the games played on one configuration.
+    """
+    games = len(results)
+    wins = sum(result["won"] for result in results)
+    moves = sum(result["moves"] for result in results)
+    guesses = sum(result["guesses"] for result in results)
+    playing = sum(result["elapsed"] for result in results)
+    inference = sum(result["inference"] for result in results)
+
+    print(f"Board {height}x{width}, {mines} mines, {games} games "
+          f"({elapsed:.2f}s wall)")
+    print(f"  Win rate: {100 * wins / games:.1f}%")
+    print(f"  Moves per game: {moves / games:.1f} "
+          f"({guesses / games:.1f} guesses)")
+    print(f"  Moves per second: {moves / playing:.0f}")
+    print(f"  Inference per move: {1e3 * inference / max(moves, 1):.3f}ms")
+
+    # Average knowledge base size at the same stage of every game
+    sizes = []
+    for checkpoint in CHECKPOINTS:
+        samples = [
+            result["knowledge"][int(checkpoint * (len(result["knowledge"]) - 1))]
+            for result in results if result["knowledge"]
+        ]
+        sizes.append(sum(samples) / max(len(samples), 1))
+    stages = ", ".join(
+        f"{100 * checkpoint:.0f}%: {size:.1f}"
+        for checkpoint, size in zip(CHECKPOINTS, sizes)
+    )
+    print(f"  Knowledge base size: {stages}")
+
+
+if __name__ == "__main__":
+    main()
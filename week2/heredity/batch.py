@@ -0,0 +1,157 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+from heredity import load_data, parse_person
+from network import TooWide, compile_cpts, exact_probabilities
+
+# Inference methods, "auto" being exact inference that falls back to
+# Gibbs sampling for families too interrelated for it
+METHODS = ["auto", "exact", "pruned", "vectorized", "gibbs", "weighting"]
+
+# Families handed to a worker process at a time
+CHUNKSIZE = 16
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities of many families."
+    )
+    parser.add_argument("input",
+                        help="directory of family CSV files, or a CSV file "
+                             "with a family column")
+    parser.add_argument("-m", "--method", choices=METHODS, default="auto")
+    parser.add_argument("-f", "--format", choices=["csv", "jsonl"],
+                        default="csv", help="output format")
+    parser.add_argument("-o", "--output",
+                        help="file to write to (default: standard output)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    with output:
+        write = writer(output, args.format)
+        families = (load_directory(args.input) if os.path.isdir(args.input)
+                    else load_families(args.input))
+
+        # Probability tables are compiled once and shared by every worker
+        with multiprocessing.Pool(
+            args.workers, initializer=_init_worker,
+            initargs=(args.method, compile_cpts())
+        ) as pool:
+            for family, probabilities, error in pool.imap(
+                _infer, families, chunksize=CHUNKSIZE
+            ):
+                if error is not None:
+                    print(f"{family}: {error}", file=sys.stderr)
+                    continue
+                for name, person in probabilities.items():
+                    write(family, name, person)
+
+
+def load_directory(directory):
+    """
+    Yield (family, people) pairs for every CSV file in `directory`, in
+    sorted order, named after the file.
+    """
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".csv"):
+            family = os.path.splitext(filename)[0]
+            yield family, load_data(os.path.join(directory, filename))
+
+
+def load_families(filename):
+    """
+    Yield (family, people) pairs from a CSV file with fields family,
+    name, mother, father, trait, one family at a time. The rows of each
+    family must be next to each other.
+    """
+    with open(filename) as f:
+        reader = csv.DictReader(f)
+        for family, rows in itertools.groupby(
+            reader, key=lambda row: row["family"]
+        ):
+            yield family, {row["name"]: parse_person(row) for row in rows}
+
+
+def writer(output, format):
+    """
+    Return a function that writes the distribution of one person of a
+    family to `output` as a row of CSV or a line of JSON.
+    """
+    if format == "jsonl":
+        def write(family, name, person):
+            output.write(json.dumps({
+                "family": family,
+                "name": name,
+                "gene": [person["gene"][g] for g in range(3)],
+                "trait": person["trait"][True]
+            }) + "\n")
+        return write
+
+    rows = csv.writer(output)
+    rows.writerow(["family", "name", "gene0", "gene1", "gene2", "trait"])
+
+    def write(family, name, person):
+        rows.writerow([family, name] + [
+            f"{p:.6f}" for p in (*(person["gene"][g] for g in range(3)),
+                                 person["trait"][True])
+        ])
+    return write
+
+
+# Inference method and compiled probability tables, set once in each
+# worker process
+_settings = None
+
+
+def _init_worker(method, cpts):
+    global _settings
+    _settings = (method, cpts)
+
+
+def _infer(job):
+    """
+    Compute the probabilities of one family. Return a tuple
+    (family, probabilities, error) where `error` describes why they could
+    not be computed, or is None.
+    """
+    family, people = job
+    method, cpts = _settings
+    try:
+        if method in ("auto", "exact"):
+            try:
+                return family, exact_probabilities(people, cpts), None
+            except TooWide:
+                if method == "exact":
+                    raise
+                method = "gibbs"
+        if method == "pruned":
+            from enumeration import pruned_probabilities
+            return family, pruned_probabilities(people)[0], None
+        if method == "vectorized":
+            from enumeration import vector_probabilities
+            return family, vector_probabilities(people), None
+
+        # Workers cannot start processes of their own
+        from sampling import MIN_EFFECTIVE, sample_probabilities
+        probabilities, _, diagnostics = sample_probabilities(
+            people, method, processes=1, cpts=cpts
+        )
+        if diagnostics.get("effective_samples", MIN_EFFECTIVE) < MIN_EFFECTIVE:
+            return family, None, (
+                f"too few effective samples for likelihood weighting "
+                f"({diagnostics['effective_samples']:.1f})"
+            )
+        return family, probabilities, None
+    except (TooWide, KeyError, ValueError) as e:
+        return family, None, f"{type(e).__name__}: {e}"
+
+
+if __name__ == "__main__":
+    main()
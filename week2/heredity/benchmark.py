@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+
+from enumeration import pruned_probabilities, vector_probabilities
+from heredity import (PROBS, enumerate_probabilities, family_parents,
+                      joint_probability, joint_probability_array, load_data,
+                      powerset)
+from network import TooWide, exact_probabilities
+from pedigree import generate_pedigree
+from sampling import sample_probabilities
+
+FAMILIES = [
+    os.path.join(os.path.dirname(__file__), "data", f"family{i}.csv")
+    for i in range(3)
+]
+
+# Seconds spent timing each implementation
+DURATION = 1.0
+
+# Sizes of the generated families on which the inference methods are
+# compared, and the fraction of people partnered within the family
+SIZES = [4, 6, 8, 10, 12, 50, 200, 1000]
+INBREEDING = 0.05
+
+# Inference methods, with the largest family each is run on
+BACKENDS = [
+    ("enumerate", enumerate_probabilities, 8),
+    ("vectorized", vector_probabilities, 10),
+    ("pruned", lambda people: pruned_probabilities(people)[0], 12),
+    ("exact", exact_probabilities, None),
+    ("gibbs", lambda people: sample_probabilities(people, "gibbs")[0], None),
+    ("weighting",
+     lambda people: sample_probabilities(people, "weighting")[0], None)
+]
+
+# Largest difference from exact inference at which a method agrees with
+# it, for exact methods and for samplers
+EXACT_TOLERANCE = 1e-9
+SAMPLE_TOLERANCE = 0.05
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [seed]")
+    seed = int(sys.argv[1]) if len(sys.argv) == 2 else 0
+
+    benchmark_joint()
+    print()
+    benchmark_scaling(seed)
+
+
+def benchmark_joint():
+    """
+    Compare the rate at which joint probabilities are computed from sets
+    of names by the original if/elif cascade and by table lookups, as
+    `main` does, and from integer gene and trait arrays.
+    """
+    print(f"{'family':>12} {'people':>6} {'cascade/s':>10} {'sets/s':>10} "
+          f"{'arrays/s':>10}")
+    for filename in FAMILIES:
+        people = load_data(filename)
+        family = os.path.basename(filename)
+        names = set(people)
+        parents = family_parents(people)
+
+        assignments = [
+            (one_gene, two_genes, have_trait)
+            for have_trait in powerset(names)
+            for one_gene in powerset(names)
+            for two_genes in powerset(names - one_gene)
+        ]
+        arrays = [
+            (
+                [(person in one_gene) + 2 * (person in two_genes)
+                 for person in people],
+                [int(person in have_trait) for person in people]
+            )
+            for one_gene, two_genes, have_trait in assignments
+        ]
+
+        cascade = rate(lambda: [
+            cascade_joint_probability(people, one_gene, two_genes, have_trait)
+            for one_gene, two_genes, have_trait in assignments
+        ], len(assignments))
+        sets = rate(lambda: [
+            joint_probability(people, one_gene, two_genes, have_trait)
+            for one_gene, two_genes, have_trait in assignments
+        ], len(assignments))
+        tables = rate(lambda: [
+            joint_probability_array(parents, genes, traits)
+            for genes, traits in arrays
+        ], len(arrays))
+        print(f"{family:>12} {len(people):>6} {cascade:>10.0f} "
+              f"{sets:>10.0f} {tables:>10.0f}")
+
+
+def cascade_joint_probability(people, one_gene, two_genes, have_trait):
+    """
+    Compute a joint probability like `joint_probability` did before its
+    probability tables were precomputed, working out each person's
+    inheritance probability case by case. Kept as the baseline of
+    `benchmark_joint`.
+    """
+    joint_prob = 1
+
+    for person in people:
+        person_gene = 1 * (person in one_gene) + 2 * (person in two_genes)
+        has = person in have_trait
+
+        father = people[person]["father"]
+        mother = people[person]["mother"]
+
+        # If parents not in the list
+        if mother is None:
+            trait_prob = (PROBS["gene"][person_gene]
+                          * PROBS["trait"][person_gene][has])
+
+        # If parents in the list
+        else:
+            mother_gene = 1 * (mother in one_gene) + 2 * (mother in two_genes)
+            father_gene = 1 * (father in one_gene) + 2 * (father in two_genes)
+
+            # Calculating person's gene probability based on the mother and
+            # father genes
+            mutation = PROBS["mutation"]
+            no_mutation = 1 - PROBS["mutation"]
+
+            if person_gene == 0:
+                if mother_gene == 0 and father_gene == 0:
+                    gene_prob = no_mutation * no_mutation
+                elif (mother_gene == 0 and father_gene == 1) or (mother_gene == 1 and father_gene == 0):
+                    gene_prob = 0.5 * no_mutation
+                elif (mother_gene == 0 and father_gene == 2) or (mother_gene == 2 and father_gene == 0):
+                    gene_prob = no_mutation * mutation
+                elif mother_gene == 1 and father_gene == 1:
+                    gene_prob = 0.5 * 0.5
+                elif (mother_gene == 1 and father_gene == 2) or (mother_gene == 2 and father_gene == 1):
+                    gene_prob = 0.5 * mutation
+                elif mother_gene == 2 and father_gene == 2:
+                    gene_prob = mutation * mutation
+
+            if person_gene == 1:
+                if (mother_gene == 0 and father_gene == 0) or (mother_gene == 2 and father_gene == 2):
+                    gene_prob = 2 * mutation * no_mutation
+                elif (mother_gene == 0 and father_gene == 2) or (mother_gene == 2 and father_gene == 0):
+                    gene_prob = no_mutation * no_mutation + mutation * mutation
+                elif mother_gene == 1 and father_gene == 1:
+                    gene_prob = 2 * 0.5 * 0.5
+                else:
+                    gene_prob = no_mutation * 0.5 + mutation * 0.5
+
+            if person_gene == 2:
+                if mother_gene == 0 and father_gene == 0:
+                    gene_prob = mutation * mutation
+                elif (mother_gene == 0 and father_gene == 1) or (father_gene == 0 and mother_gene == 1):
+                    gene_prob = 0.5 * mutation
+                elif (mother_gene == 0 and father_gene == 2) or (father_gene == 0 and mother_gene == 2):
+                    gene_prob = mutation * no_mutation
+                elif mother_gene == 1 and father_gene == 1:
+                    gene_prob = 0.5 * 0.5
+                elif (mother_gene == 1 and father_gene == 2) or (father_gene == 1 and mother_gene == 2):
+                    gene_prob = 0.5 * no_mutation
+                elif mother_gene == 2 and father_gene == 2:
+                    gene_prob = no_mutation * no_mutation
+
+            # Probability of having or not having the trait given the gene
+            trait_prob = gene_prob * PROBS["trait"][person_gene][has]
+
+        joint_prob *= trait_prob
+
+    return joint_prob
+
+
+def benchmark_scaling(seed):
+    """
+    Time every inference method on generated families of growing size,
+    and check that their marginals agree with exact inference.
+    """
+    print(f"{'people':>6} {'method':>10} {'time':>9} {'difference':>10}")
+    for size in SIZES:
+        people = generate_pedigree(size, inbreeding=INBREEDING, seed=seed)
+        try:
+            reference = exact_probabilities(people)
+        except TooWide:
+            reference = None
+
+        for name, method, limit in BACKENDS:
+            if limit is not None and size > limit:
+                continue
+            start = time.perf_counter()
+            try:
+                probabilities = method(people)
+            except TooWide:
+                print(f"{size:>6} {name:>10} {'too wide':>9}")
+                continue
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                print(f"{size:>6} {name:>10} {elapsed:>8.3f}s")
+                continue
+
+            difference = max(
+                abs(probabilities[person][field][value]
+                    - reference[person][field][value])
+                for person in people
+                for field in reference[person]
+                for value in reference[person][field]
+            )
+            tolerance = (SAMPLE_TOLERANCE if name in ("gibbs", "weighting")
+                         else EXACT_TOLERANCE)
+            agreement = "" if difference <= tolerance else "  disagrees"
+            print(f"{size:>6} {name:>10} {elapsed:>8.3f}s "
+                  f"{difference:>10.1e}{agreement}")
+
+
+def rate(function, count):
+    """
+    Return how many times per second `function`, which computes `count`
+    joint probabilities, computes one.
+    """
+    calls = 0
+    start = time.perf_counter()
+    while calls == 0 or time.perf_counter() - start < DURATION:
+        function()
+        calls += 1
+    return calls * count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
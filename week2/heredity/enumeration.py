@@ -0,0 +1,239 @@
+import collections
+import itertools
+
+import numpy as np
+
+from heredity import CHILD, FOUNDER, INHERITANCE, PROBS, family_parents
+from network import compile_cpts, to_probabilities, trait_marginals
+
+# Assignments of genes and traits evaluated at a time
+CHUNK = 1 << 16
+
+
+def vector_probabilities(people, chunk=CHUNK):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    like `heredity.enumerate_probabilities`, by evaluating the joint
+    probability of `chunk` assignments at a time with array lookups.
+
+    Assignment number k gives person i the gene count of the i-th base 3
+    digit of k, and gives the people whose trait is unknown the traits of
+    the bits of k divided by 3 ** n. People with a known trait always have
+    it, so assignments that contradict the evidence are never generated.
+    """
+    names = list(people)
+    n = len(names)
+    parents = family_parents(people)
+    founders = np.array([pair is None for pair in parents])
+    children = np.flatnonzero(~founders)
+    mothers = np.array([parents[i][0] for i in children], dtype=np.int64)
+    fathers = np.array([parents[i][1] for i in children], dtype=np.int64)
+
+    # Known traits are fixed, unknown ones are enumerated
+    known = np.array([people[name]["trait"] is not None for name in names])
+    fixed = np.array([bool(people[name]["trait"]) for name in names])
+    unknown = np.flatnonzero(~known)
+
+    founder_table = np.array(FOUNDER)
+    child_table = np.array(CHILD)
+    gene_powers = 3 ** np.arange(n, dtype=np.int64)
+    trait_powers = 2 ** np.arange(len(unknown), dtype=np.int64)
+    total = 3 ** n * 2 ** len(unknown)
+
+    # Offsets that give every person their own bins in a single bincount
+    gene_bins = 3 * np.arange(n)
+    trait_bins = 2 * np.arange(n)
+    genes_sum = np.zeros(3 * n)
+    traits_sum = np.zeros(2 * n)
+
+    for start in range(0, total, chunk):
+        codes = np.arange(start, min(start + chunk, total), dtype=np.int64)
+        genes = (codes[:, None] // gene_powers) % 3
+        traits = np.broadcast_to(fixed, (len(codes), n)).astype(np.int64)
+        traits[:, unknown] = (codes[:, None] // 3 ** n // trait_powers) % 2
+
+        p = np.prod(founder_table[genes[:, founders], traits[:, founders]],
+                    axis=1)
+        p *= np.prod(child_table[genes[:, mothers], genes[:, fathers],
+                                 genes[:, children], traits[:, children]],
+                     axis=1)
+
+        genes_sum += np.bincount((genes + gene_bins).ravel(),
+                                 weights=np.repeat(p, n), minlength=3 * n)
+        traits_sum += np.bincount((traits + trait_bins).ravel(),
+                                  weights=np.repeat(p, n), minlength=2 * n)
+
+    genes_sum = genes_sum.reshape(n, 3)
+    traits_sum = traits_sum.reshape(n, 2)
+    return to_probabilities(
+        names,
+        genes_sum / genes_sum.sum(axis=1, keepdims=True),
+        traits_sum / traits_sum.sum(axis=1, keepdims=True)
+    )
+
+
+def topological_order(people):
+    """
+    Return the names in `people` ordered so that parents come before
+    their children.
+    """
+    order = []
+    placed = set()
+
+    def place(name):
+        if name in placed:
+            return
+        for parent in (people[name]["mother"], people[name]["father"]):
+            if parent is not None:
+                place(parent)
+        placed.add(name)
+        order.append(name)
+
+    for name in people:
+        place(name)
+    return order
+
+
+def relevant_people(people):
+    """
+    Return the set of people whose trait is known, together with all
+    their ancestors. Everyone else has no known trait among themselves or
+    their descendants, so the evidence does not depend on them.
+    """
+    relevant = set()
+    pending = [name for name in people if people[name]["trait"] is not None]
+    while pending:
+        name = pending.pop()
+        if name in relevant:
+            continue
+        relevant.add(name)
+        for parent in (people[name]["mother"], people[name]["father"]):
+            if parent is not None:
+                pending.append(parent)
+    return relevant
+
+
+def person_factor(people, name, observed=True):
+    """
+    Return the factor of `name`'s gene count given their parents' as a
+    nested list indexed [mother][father][gene], or [gene] if their
+    parents are unknown, weighed by the probability of their known trait
+    if `observed` is True.
+    """
+    trait = people[name]["trait"] if observed else None
+    if people[name]["mother"] is None:
+        if trait is None:
+            return [PROBS["gene"][g] for g in range(3)]
+        return [FOUNDER[g][trait] for g in range(3)]
+    if trait is None:
+        return INHERITANCE
+    return [[[CHILD[m][f][g][trait] for g in range(3)]
+             for f in range(3)] for m in range(3)]
+
+
+def assignments(people, order, factors, fixed=None):
+    """
+    Lazily yield (genes, weight) for every assignment of gene counts to
+    the people in `order`, where `genes` maps each of them, and the people
+    whose gene counts are `fixed`, to their gene count and `weight` is the
+    product of the `factors` of the people in `order`.
+    """
+    fixed = fixed or {}
+    for counts in itertools.product(range(3), repeat=len(order)):
+        genes = {**fixed, **dict(zip(order, counts))}
+        weight = 1
+        for name in order:
+            gene = genes[name]
+            mother = people[name]["mother"]
+            if mother is None:
+                weight *= factors[name][gene]
+            else:
+                father = people[name]["father"]
+                weight *= factors[name][genes[mother]][genes[father]][gene]
+        yield genes, weight
+
+
+def pruned_probabilities(people):
+    """
+    Return a tuple (probabilities, stats) where `probabilities` holds the
+    gene and trait distribution of every person in `people`, like
+    `heredity.enumerate_probabilities`, enumerating as few assignments as
+    the evidence allows:
+        - known traits are never enumerated, and unknown ones, on which
+          nothing else depends, are summed out of each gene count;
+        - only people with a known trait and their ancestors are
+          enumerated jointly;
+        - everyone else, such as founders with no known trait among
+          themselves or their descendants, is left out of that joint
+          enumeration and later enumerated only together with their own
+          ancestors outside it and the parents inside it they depend on.
+
+    `stats` records the number of joint probabilities `evaluated`, the
+    number `main` evaluates by brute force, and the number `avoided`.
+    """
+    order = topological_order(people)
+    relevant = relevant_people(people)
+    joint = [name for name in order if name in relevant]
+    barren = [name for name in order if name not in relevant]
+    evaluated = 0
+
+    # Distribution of everyone in the joint enumeration
+    genes_sum = {name: [0, 0, 0] for name in people}
+    factors = {name: person_factor(people, name) for name in joint}
+
+    # For each other person, the people outside the joint enumeration
+    # they depend on, and the parents inside it of those people
+    ancestry = {}
+    for name in barren:
+        group = {name}
+        pending = [name]
+        while pending:
+            person = people[pending.pop()]
+            for parent in (person["mother"], person["father"]):
+                if parent is not None and parent not in relevant \
+                        and parent not in group:
+                    group.add(parent)
+                    pending.append(parent)
+        group = [person for person in order if person in group]
+        boundary = sorted({
+            parent for person in group
+            for parent in (people[person]["mother"], people[person]["father"])
+            if parent is not None and parent in relevant
+        })
+        ancestry[name] = (group, boundary)
+
+    # Joint distribution of each boundary, collected while enumerating
+    boundaries = {name: collections.Counter() for name in barren}
+    for genes, weight in assignments(people, joint, factors):
+        evaluated += 1
+        for name in joint:
+            genes_sum[name][genes[name]] += weight
+        for name in barren:
+            boundary = ancestry[name][1]
+            boundaries[name][tuple(genes[b] for b in boundary)] += weight
+
+    # Everyone else follows their parents with no evidence to weigh them
+    forward = {name: person_factor(people, name, observed=False)
+               for name in barren}
+    for name in barren:
+        group, boundary = ancestry[name]
+        for known, boundary_weight in boundaries[name].items():
+            fixed = dict(zip(boundary, known))
+            for genes, weight in assignments(people, group, forward, fixed):
+                evaluated += 1
+                genes_sum[name][genes[name]] += boundary_weight * weight
+
+    names = list(people)
+    genes = np.array([genes_sum[name] for name in names], dtype=float)
+    genes /= genes.sum(axis=1, keepdims=True)
+    cpts = compile_cpts()
+    traits = trait_marginals(people, names, genes, cpts)
+
+    unknown = sum(people[name]["trait"] is None for name in people)
+    brute_force = 3 ** len(people) * 2 ** unknown
+    stats = {
+        "evaluated": evaluated,
+        "brute_force": brute_force,
+        "avoided": brute_force - evaluated
+    }
+    return to_probabilities(names, genes, traits), stats
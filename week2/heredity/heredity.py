@@ -37,12 +37,119 @@ PROBS = {
 }
 
 
+def inheritance_table(mutation):
+    """
+    Return a 3 x 3 x 3 nested list whose entry [m][f][c] is the
+    probability that a child whose mother has `m` copies of the gene and
+    whose father has `f` copies has `c` copies.
+    """
+    # Probability that a parent with 0, 1 or 2 copies passes the gene on
+    passes = [mutation, 0.5, 1 - mutation]
+    return [
+        [
+            [
+                (1 - mother) * (1 - father),
+                mother * (1 - father) + (1 - mother) * father,
+                mother * father
+            ]
+            for father in passes
+        ]
+        for mother in passes
+    ]
+
+
+# Probability of each gene count given the parents' gene counts
+INHERITANCE = inheritance_table(PROBS["mutation"])
+
+# Probability of a gene count and of not having or having the trait, for
+# people whose parents are unknown (FOUNDER[g][t]) and for children of
+# parents with known gene counts (CHILD[m][f][g][t])
+FOUNDER = [
+    [PROBS["gene"][g] * PROBS["trait"][g][False],
+     PROBS["gene"][g] * PROBS["trait"][g][True]]
+    for g in range(3)
+]
+CHILD = [
+    [
+        [
+            [INHERITANCE[m][f][g] * PROBS["trait"][g][False],
+             INHERITANCE[m][f][g] * PROBS["trait"][g][True]]
+            for g in range(3)
+        ]
+        for f in range(3)
+    ]
+    for m in range(3)
+]
+
+# Options selecting an inference method other than plain enumeration
+METHODS = ["--exact", "--vectorized", "--pruned", "--gibbs", "--weighting"]
+
+
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    args = sys.argv[1:]
+    method = next((arg for arg in args if arg in METHODS), None)
+    if method:
+        args.remove(method)
+    if len(args) != 1:
+        sys.exit(f"Usage: python heredity.py [{' | '.join(METHODS)}] data.csv")
+    people = load_data(args[0])
+    errors = None
+
+    if method == "--exact":
+        # Exact inference over the family tree instead of enumeration
+        from network import TooWide, exact_probabilities
+        try:
+            probabilities = exact_probabilities(people)
+        except TooWide as e:
+            sys.exit(f"Family too interrelated for exact inference "
+                     f"({e} people would be tracked together)")
+    elif method == "--vectorized":
+        # Enumeration of whole chunks of assignments at once
+        from enumeration import vector_probabilities
+        probabilities = vector_probabilities(people)
+    elif method == "--pruned":
+        # Enumeration of only the assignments the evidence depends on
+        from enumeration import pruned_probabilities
+        probabilities, stats = pruned_probabilities(people)
+        print(f"Joint probabilities evaluated: {stats['evaluated']} "
+              f"({stats['avoided']} avoided)")
+    elif method in ("--gibbs", "--weighting"):
+        # Approximate inference by sampling, with standard errors
+        from sampling import MIN_EFFECTIVE, sample_probabilities
+        probabilities, errors, diagnostics = sample_probabilities(
+            people, method[2:]
+        )
+        for name, value in diagnostics.items():
+            print(f"{name.replace('_', ' ').capitalize()}: {value:.4f}")
+        if method == "--weighting" \
+                and diagnostics["effective_samples"] < MIN_EFFECTIVE:
+            sys.exit(f"Too few effective samples for likelihood weighting "
+                     f"(fewer than {MIN_EFFECTIVE}), try --gibbs or --exact")
+    else:
+        probabilities = enumerate_probabilities(people)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                if errors is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    error = errors[person][field][value]
+                    print(f"    {value}: {p:.4f} ± {error:.4f}")
+
+
+def enumerate_probabilities(people):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    given the known traits, by summing joint probabilities over every
+    possible assignment of genes and traits.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -83,15 +190,7 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
@@ -105,17 +204,24 @@ def load_data(filename):
     with open(filename) as f:
         reader = csv.DictReader(f)
         for row in reader:
-            name = row["name"]
-            data[name] = {
-                "name": name,
-                "mother": row["mother"] or None,
-                "father": row["father"] or None,
-                "trait": (True if row["trait"] == "1" else
-                          False if row["trait"] == "0" else None)
-            }
+            data[row["name"]] = parse_person(row)
     return data
 
 
+def parse_person(row):
+    """
+    Return the dictionary describing the person in a CSV row with fields
+    name, mother, father, trait.
+    """
+    return {
+        "name": row["name"],
+        "mother": row["mother"] or None,
+        "father": row["father"] or None,
+        "trait": (True if row["trait"] == "1" else
+                  False if row["trait"] == "0" else None)
+    }
+
+
 def powerset(s):
     """
     Return a list of all possible subsets of set s.
@@ -139,91 +245,54 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in set` have_trait` does not have the trait.
     """
     joint_prob = 1
-
     for person in people:
-        person_gene = 1 *(person in one_gene) + 2 * (person in two_genes)
+        gene = (person in one_gene) + 2 * (person in two_genes)
         has = person in have_trait
-
-        father = people[person]["father"]
         mother = people[person]["mother"]
 
         # If parents not in the list
         if mother is None:
-            trait_prob = PROBS["gene"][person_gene] * PROBS["trait"][person_gene][has]
-        
+            joint_prob *= FOUNDER[gene][has]
+
         # if parents in the list
         else:
-            mother_gene = 1 * (mother in one_gene) + 2 * (mother in two_genes)
-            father_gene = 1 * (father in one_gene) + 2 * (father in two_genes)
-        
-            # Calculating person's gene probability based on the mother and father genes
-            mutation = PROBS["mutation"]
-            no_mutation = 1 - PROBS["mutation"]
-
-            # Probabilities for 0 gene pair 
-            if person_gene == 0:
-
-                # (0, 0) leads to 0 if no mutation takes place
-                if mother_gene == 0 and father_gene == 0:
-                    gene_prob = no_mutation * no_mutation
-               # 1 leads to 0 50% of time and when 0 undergoes no mutation
-                elif (mother_gene == 0 and father_gene == 1) or (mother_gene== 1 and father_gene == 0):
-                    gene_prob = 0.5 * no_mutation
-               # (0, 2) or (2, 0) leads to zero only when 2 pair gene undergoes mutation 
-                elif (mother_gene == 0 and father_gene == 2) or (mother_gene == 2 and father_gene== 0):
-                    gene_prob = no_mutation * mutation
-               # (1, 1) each gene leads to 0 with half a probability 
-                elif (mother_gene == 1 and father_gene == 1):
-                    gene_prob = 0.5 * 0.5 
-                # For (0,2 ) or (2, 0) 2 needs to undergo mutation
-                elif (mother_gene == 1 and father_gene == 2) or (mother_gene == 2 and father_gene == 1):
-                    gene_prob = 0.5 * mutation
-                # (2, 2) both pair should undergo mutation
-                elif (mother_gene == 2 and father_gene == 2):
-                    gene_prob = mutation * mutation
-
-            if person_gene == 1:
-                # (0, 0) and (2, 2) one  gene in the both gene pair needs mutation
-                if (mother_gene == 0 and father_gene == 0) or (mother_gene == 2 and father_gene == 2):
-                    gene_prob = mutation * no_mutation 
-                # (0, 2) and (2, 0) : Either both undergo mutation or neither does 
-                elif (mother_gene == 0 and father_gene == 2) or (mother_gene == 2 and father_gene==0):
-                    gene_prob = no_mutation * no_mutation + mutation * mutation
-                # (1, 1) leds to 1 50% if the time
-                elif (mother_gene == 1 and father_gene == 1):
-                    gene_prob =  2* 0.5  * 0.5
-                #(0, 1), (1, 0), (2, 1), (1, 2)
-                else:
-                    gene_prob = no_mutation * 0.5 + mutation * 0.5
-
-            if person_gene == 2:
-                # (0, 0)
-                if mother_gene == 0 and father_gene == 0:
-                    gene_prob = mutation * mutation
-                # (0, 1)
-                elif (mother_gene == 0 and father_gene == 1) or (father_gene == 0 and mother_gene == 1):
-                    gene_prob = 0.5 * mutation
-                # (0, 2)and (2, 0)
-                elif (mother_gene == 0 and father_gene == 2) or (father_gene == 0 and mother_gene==2):
-                    gene_prob = mutation * no_mutation
-                # (1, 1)
-                elif (mother_gene == 1 and father_gene == 1):
-                    gene_prob = 0.5  * 0.5
-                # (1, 2) and (2, 1)
-                elif (mother_gene == 1 and father_gene == 2) or (father_gene == 1 and mother_gene == 2):
-                    gene_prob = 0.5 * no_mutation
-                # (2, 2)
-                elif(mother_gene ==2 and father_gene == 2):
-                    gene_prob = no_mutation * no_mutation
-            
-            # Probabiliity of having or not having the trait given gene probability
-            trait_prob = gene_prob * PROBS["trait"][person_gene][has]
-
-        joint_prob *= trait_prob
-    
+            father = people[person]["father"]
+            mother_gene = (mother in one_gene) + 2 * (mother in two_genes)
+            father_gene = (father in one_gene) + 2 * (father in two_genes)
+            joint_prob *= CHILD[mother_gene][father_gene][gene][has]
+
     return joint_prob
 
 
+def family_parents(people):
+    """
+    Return a list giving, for each person in `people` in order, the pair
+    of indices of their mother and father, or None if they are unknown.
+    """
+    index = {person: i for i, person in enumerate(people)}
+    return [
+        None if people[person]["mother"] is None
+        else (index[people[person]["mother"]], index[people[person]["father"]])
+        for person in people
+    ]
+
+
+def joint_probability_array(parents, genes, traits):
+    """
+    Compute the joint probability of an assignment given as sequences of
+    integers: `genes[i]` is the number of copies of the gene of person i
+    and `traits[i]` is 1 if they have the trait, 0 otherwise. `parents` is
+    the list returned by `family_parents`.
+    """
+    joint_prob = 1
+    for i, pair in enumerate(parents):
+        if pair is None:
+            joint_prob *= FOUNDER[genes[i]][traits[i]]
+        else:
+            mother, father = pair
+            joint_prob *= CHILD[genes[mother]][genes[father]][genes[i]][traits[i]]
+    return joint_prob
+
 
 def update(probabilities, one_gene, two_genes, have_trait, p):
     """
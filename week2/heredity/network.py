@@ -0,0 +1,251 @@
+import heapq
+
+import numpy as np
+
+from heredity import PROBS, inheritance_table
+
+# Most people whose genes are tracked together during exact inference,
+# as tables over them have 3 ** MAX_CLUSTER entries
+MAX_CLUSTER = 14
+
+
+class TooWide(Exception):
+    """
+    Raised when a family tree has too many loops for exact inference.
+    """
+
+
+def compile_cpts(probs=PROBS):
+    """
+    Turn the probabilities in `probs` into arrays indexed by gene count:
+        - `gene`: the probability of each gene count for a person whose
+          parents are unknown,
+        - `inheritance`: the table from `heredity.inheritance_table`, and
+        - `trait`: a 3 x 2 array whose entry [g, t] is the probability of
+          having the trait (t = 1) or not (t = 0) given `g` copies.
+    """
+    return {
+        "gene": np.array([probs["gene"][g] for g in range(3)]),
+        "inheritance": np.array(inheritance_table(probs["mutation"])),
+        "trait": np.array([
+            [probs["trait"][g][False], probs["trait"][g][True]]
+            for g in range(3)
+        ])
+    }
+
+
+def factors(people, cpts):
+    """
+    Build the Bayesian network of a family loaded by `load_data`.
+
+    Return a tuple (names, parents, factors) where `names` lists the people,
+    `parents[i]` is the pair of indices of person i's mother and father
+    (or None), and `factors` is a list of (variables, table) pairs whose
+    product is the joint probability of everyone's gene count and of the
+    observed traits. Each variable is the index of a person, whose gene
+    count indexes the matching axis of the table.
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    parents = []
+    result = []
+    for i, name in enumerate(names):
+        person = people[name]
+        if person["mother"] is None:
+            parents.append(None)
+            variables, table = (i,), cpts["gene"]
+        else:
+            mother, father = index[person["mother"]], index[person["father"]]
+            parents.append((mother, father))
+            variables, table = (mother, father, i), cpts["inheritance"]
+        result.append((variables, table))
+
+        # Observed traits weigh each gene count by how likely it makes them
+        if person["trait"] is not None:
+            result.append(((i,), cpts["trait"][:, int(person["trait"])]))
+    return names, parents, result
+
+
+def combine(factors, variables):
+    """
+    Multiply `factors` together and sum out every variable not in
+    `variables`. Return the table over `variables`, in that order.
+    """
+    labels = {}
+    operands = []
+    for factor_variables, table in factors:
+        operands.append(table)
+        operands.append([labels.setdefault(v, len(labels))
+                         for v in factor_variables])
+
+    # Variables that appear in no factor have a uniform factor
+    for v in variables:
+        if v not in labels:
+            operands.append(np.ones(3))
+            operands.append([labels.setdefault(v, len(labels))])
+    return np.einsum(*operands, [labels[v] for v in variables],
+                     optimize=len(factors) > 2)
+
+
+def elimination_order(n, factors):
+    """
+    Choose an order in which to eliminate the `n` variables of `factors`,
+    greedily picking the variable whose elimination adds the fewest new
+    edges between the remaining ones (min-fill).
+
+    Return a tuple (order, clusters) where `clusters[k]` is the set of
+    variables connected to `order[k]`, itself included, when it is
+    eliminated.
+
+    Raise TooWide if a cluster has more than `MAX_CLUSTER` variables.
+    """
+    neighbors = [set() for _ in range(n)]
+    for variables, _ in factors:
+        for v in variables:
+            neighbors[v].update(variables)
+    for v in range(n):
+        neighbors[v].discard(v)
+
+    def score(v):
+        others = list(neighbors[v])
+        fill = sum(
+            others[b] not in neighbors[others[a]]
+            for a in range(len(others)) for b in range(a + 1, len(others))
+        )
+        return (fill, len(others), v)
+
+    # Scores only change near an eliminated variable, so stale entries
+    # are left in the heap and skipped when they come up
+    scores = [score(v) for v in range(n)]
+    heap = list(scores)
+    heapq.heapify(heap)
+
+    eliminated = [False] * n
+    order = []
+    clusters = []
+    while heap:
+        entry = heapq.heappop(heap)
+        v = entry[2]
+        if eliminated[v] or entry != scores[v]:
+            continue
+        if len(neighbors[v]) >= MAX_CLUSTER:
+            raise TooWide(len(neighbors[v]) + 1)
+        eliminated[v] = True
+        order.append(v)
+        clusters.append(neighbors[v] | {v})
+
+        for u in neighbors[v]:
+            neighbors[u] |= neighbors[v] - {u}
+            neighbors[u].discard(v)
+        nearby = set(neighbors[v])
+        for u in neighbors[v]:
+            nearby |= neighbors[u]
+        for u in nearby:
+            scores[u] = score(u)
+            heapq.heappush(heap, scores[u])
+    return order, clusters
+
+
+def junction_tree(n, factors):
+    """
+    Compute the marginal distribution of every variable of `factors` by
+    message passing over the junction tree of an elimination order.
+
+    Cluster k holds the variables around the k-th eliminated variable
+    and is joined to the cluster of whichever of its other variables is
+    eliminated first. Messages are passed towards the last clusters and
+    back, after which each cluster's product of factors and messages is
+    proportional to the marginal of its variables.
+
+    Return an n x 3 array whose row i is the distribution of variable i.
+    """
+    order, clusters = elimination_order(n, factors)
+    position = {v: k for k, v in enumerate(order)}
+
+    # Each factor goes to the first cluster that contains its variables
+    assigned = [[] for _ in order]
+    for factor in factors:
+        assigned[min(position[v] for v in factor[0])].append(factor)
+
+    # Parent of every cluster and the variables they share
+    parent = [None] * len(order)
+    separator = [()] * len(order)
+    children = [[] for _ in order]
+    for k, cluster in enumerate(clusters):
+        shared = cluster - {order[k]}
+        if shared:
+            parent[k] = min(position[v] for v in shared)
+            separator[k] = tuple(sorted(shared))
+            children[parent[k]].append(k)
+
+    def normalized(table):
+        # Scale messages to avoid underflow in large families
+        return table / table.sum()
+
+    # Towards the root: clusters come before their parents in the order
+    up = [None] * len(order)
+    for k in range(len(order)):
+        if parent[k] is not None:
+            incoming = [(separator[c], up[c]) for c in children[k]]
+            up[k] = normalized(combine(assigned[k] + incoming, separator[k]))
+
+    # Away from the root
+    down = [None] * len(order)
+    for k in reversed(range(len(order))):
+        for c in children[k]:
+            incoming = [(separator[o], up[o]) for o in children[k] if o != c]
+            if parent[k] is not None:
+                incoming.append((separator[k], down[k]))
+            down[c] = normalized(
+                combine(assigned[k] + incoming, separator[c])
+            )
+
+    marginals = np.empty((n, 3))
+    for k, v in enumerate(order):
+        incoming = [(separator[c], up[c]) for c in children[k]]
+        if parent[k] is not None:
+            incoming.append((separator[k], down[k]))
+        marginals[v] = normalized(combine(assigned[k] + incoming, (v,)))
+    return marginals
+
+
+def trait_marginals(people, names, genes, cpts):
+    """
+    Return an n x 2 array of the probability of not having and of having
+    the trait for each person, given the distributions of their gene
+    counts in `genes`. Observed traits are certain.
+    """
+    traits = genes @ cpts["trait"]
+    for i, name in enumerate(names):
+        trait = people[name]["trait"]
+        if trait is not None:
+            traits[i] = [not trait, trait]
+    return traits
+
+
+def to_probabilities(names, genes, traits):
+    """
+    Convert arrays of gene and trait distributions into the nested
+    dictionaries used by `heredity.main`.
+    """
+    return {
+        name: {
+            "gene": {g: float(genes[i, g]) for g in (2, 1, 0)},
+            "trait": {True: float(traits[i, 1]), False: float(traits[i, 0])}
+        }
+        for i, name in enumerate(names)
+    }
+
+
+def exact_probabilities(people, cpts=None):
+    """
+    Return the gene and trait distribution of every person in `people`
+    given the observed traits, as computed by `heredity.main`, in time
+    that grows with the width of the family tree rather than
+    exponentially with its number of people.
+    """
+    cpts = cpts or compile_cpts()
+    names, _, network = factors(people, cpts)
+    genes = junction_tree(len(names), network)
+    return to_probabilities(names, genes,
+                            trait_marginals(people, names, genes, cpts))
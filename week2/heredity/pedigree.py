@@ -0,0 +1,132 @@
+import argparse
+import csv
+import random
+
+from heredity import INHERITANCE, PROBS
+
+# Fraction of people whose trait is known
+EVIDENCE = 0.5
+
+# Fraction of people who have children with someone of their own
+# generation rather than with someone from outside the family
+INBREEDING = 0.0
+
+# Most children of each couple
+CHILDREN = 3
+
+
+def generate_pedigree(size, evidence=EVIDENCE, inbreeding=INBREEDING,
+                      children=CHILDREN, seed=None):
+    """
+    Return a family of `size` people in the form returned by `load_data`,
+    descended from a single couple over as many generations as it takes.
+
+    Everyone in a generation has between 1 and `children` children, with
+    a partner from outside the family or, for a fraction `inbreeding` of
+    them, with another member of their generation, which makes loops in
+    the family tree. Gene counts and traits are drawn from `PROBS`, and the
+    traits of a fraction `evidence` of people are known.
+    """
+    rng = random.Random(seed)
+    people = dict()
+
+    def add(mother=None, father=None):
+        name = f"P{len(people)}"
+        if mother is None:
+            weights = [PROBS["gene"][g] for g in range(3)]
+        else:
+            weights = INHERITANCE[people[mother]["gene"]][people[father]["gene"]]
+        gene = rng.choices(range(3), weights)[0]
+        trait = rng.random() < PROBS["trait"][gene][True]
+        people[name] = {
+            "name": name,
+            "mother": mother,
+            "father": father,
+            "gene": gene,
+            "trait": trait if rng.random() < evidence else None
+        }
+        return name
+
+    generation = [add(), add()]
+    while len(people) < size:
+        following = []
+        partnered = set()
+        rng.shuffle(generation)
+        for person in generation:
+            if person in partnered:
+                continue
+            available = [other for other in generation
+                         if other != person and other not in partnered]
+            if available and rng.random() < inbreeding:
+                partner = rng.choice(available)
+            else:
+                partner = None
+            if partner is None and len(people) >= size:
+                break
+            partner = partner or add()
+            partnered.update((person, partner))
+            for _ in range(rng.randint(1, children)):
+                if len(people) >= size:
+                    break
+                following.append(add(person, partner))
+        generation = following or generation
+
+    # The generated gene counts are not part of the data
+    for person in people.values():
+        del person["gene"]
+    return people
+
+
+def write_csv(filename, families):
+    """
+    Write (family, people) pairs to `filename` in the CSV format read by
+    `load_data`, with a family column if there is more than one family.
+    """
+    families = list(families)
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        columns = ["name", "mother", "father", "trait"]
+        if len(families) > 1:
+            columns.insert(0, "family")
+        writer.writerow(columns)
+        for family, people in families:
+            for person in people.values():
+                row = [
+                    person["name"],
+                    person["mother"] or "",
+                    person["father"] or "",
+                    "" if person["trait"] is None else int(person["trait"])
+                ]
+                if len(families) > 1:
+                    row.insert(0, family)
+                writer.writerow(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic families for heredity.py."
+    )
+    parser.add_argument("size", type=int, help="people per family")
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("-n", "--families", type=int, default=1,
+                        help="families to generate into the same file")
+    parser.add_argument("-e", "--evidence", type=float, default=EVIDENCE,
+                        help="fraction of people whose trait is known")
+    parser.add_argument("-i", "--inbreeding", type=float, default=INBREEDING,
+                        help="fraction of people partnered within the family")
+    parser.add_argument("-c", "--children", type=int, default=CHILDREN,
+                        help="most children per couple")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_csv(args.output, (
+        (f"family{i}", generate_pedigree(
+            args.size, args.evidence, args.inbreeding, args.children,
+            seed=args.seed + i
+        ))
+        for i in range(args.families)
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from network import compile_cpts, factors, to_probabilities
+
+# Samples kept from each chain, and samples discarded first by Gibbs
+# sampling while chains forget their random start
+SAMPLES = 1000
+BURN_IN = 200
+
+# Independent chains, split between worker processes
+CHAINS = 8
+
+# Families sampled at a time by each chain of likelihood weighting
+BATCH = 256
+
+# Fewest effective samples of likelihood weighting whose estimates are
+# worth reporting: below it the weights have collapsed onto a handful of
+# samples, and even their standard errors cannot be trusted
+MIN_EFFECTIVE = 500
+
+
+def generations(parents):
+    """
+    Group people so that everyone comes after their parents.
+
+    Return a list of arrays of indices, the first holding the people
+    whose parents are unknown.
+    """
+    depth = [None] * len(parents)
+
+    def find(i):
+        if depth[i] is None:
+            pair = parents[i]
+            depth[i] = 0 if pair is None else 1 + max(map(find, pair))
+        return depth[i]
+
+    for i in range(len(parents)):
+        find(i)
+    depth = np.array(depth, dtype=np.int64)
+    return [np.flatnonzero(depth == d) for d in range(depth.max() + 1)]
+
+
+def colors(n, parents):
+    """
+    Split the `n` people into groups in which no two people share a
+    factor of the network, so that a whole group can be resampled at once
+    by Gibbs sampling. Return a list of arrays of indices.
+    """
+    neighbors = [set() for _ in range(n)]
+    for child, pair in enumerate(parents):
+        if pair is not None:
+            family = {child, *pair}
+            for i in family:
+                neighbors[i] |= family - {i}
+
+    color = [0] * n
+    for i in range(n):
+        used = {color[j] for j in neighbors[i] if j < i}
+        color[i] = next(c for c in range(len(used) + 1) if c not in used)
+    color = np.array(color, dtype=np.int64)
+    return [np.flatnonzero(color == c) for c in range(color.max() + 1)]
+
+
+def compile_network(people, cpts=None):
+    """
+    Return the arrays the samplers need to sample the genes of a family
+    loaded by `load_data`, in a dictionary.
+    """
+    cpts = cpts or compile_cpts()
+    names, parents, _ = factors(people, cpts)
+    n = len(names)
+
+    # Probability of each person's known trait given their gene count,
+    # or 1 if their trait is unknown
+    evidence = np.ones((n, 3))
+    for i, name in enumerate(names):
+        if people[name]["trait"] is not None:
+            evidence[i] = cpts["trait"][:, int(people[name]["trait"])]
+
+    founders = np.array([pair is None for pair in parents])
+    mothers = np.array([-1 if p is None else p[0] for p in parents])
+    fathers = np.array([-1 if p is None else p[1] for p in parents])
+
+    # Links from each parent to each of their children, and the table of
+    # the child's gene count indexed [parent, other parent, child]
+    links = [
+        (parent, child, other, role)
+        for child, pair in enumerate(parents) if pair is not None
+        for role, (parent, other) in enumerate([pair, pair[::-1]])
+    ]
+    return {
+        "names": names,
+        "cpts": cpts,
+        "evidence": evidence,
+        "founders": founders,
+        "mothers": mothers,
+        "fathers": fathers,
+        "generations": generations(parents),
+        "colors": colors(n, parents),
+        "links": np.array(links, dtype=np.int64).reshape(-1, 4),
+        "tables": np.stack([
+            cpts["inheritance"],
+            cpts["inheritance"].transpose(1, 0, 2)
+        ])
+    }
+
+
+def draw(probabilities, rng):
+    """
+    Draw one value from each distribution along the last axis of the
+    unnormalized `probabilities`.
+    """
+    cumulative = np.cumsum(probabilities, axis=-1)
+    u = rng.random(cumulative.shape[:-1] + (1,)) * cumulative[..., -1:]
+    return (u > cumulative).sum(axis=-1)
+
+
+def forward(network, chains, rng):
+    """
+    Sample the gene counts of every person in `chains` independent
+    families from the network, ignoring the evidence.
+    Return a chains x n array.
+    """
+    cpts = network["cpts"]
+    genes = np.zeros((chains, len(network["names"])), dtype=np.int64)
+    for generation in network["generations"]:
+        founders = generation[network["founders"][generation]]
+        children = generation[~network["founders"][generation]]
+        genes[:, founders] = draw(
+            np.broadcast_to(cpts["gene"], (chains, len(founders), 3)), rng
+        )
+        genes[:, children] = draw(cpts["inheritance"][
+            genes[:, network["mothers"][children]],
+            genes[:, network["fathers"][children]]
+        ], rng)
+    return genes
+
+
+def likelihood_weighting(network, chains, samples, rng):
+    """
+    Estimate the gene distributions of every person in each of `chains`
+    chains from `samples` families sampled without evidence and weighted
+    by the probability of the known traits.
+
+    Return a tuple (estimates, effective) where `estimates` is a
+    chains x n x 3 array and `effective` the effective sample size of
+    each chain.
+    """
+    n = len(network["names"])
+    bins = (3 * n * np.arange(chains))[:, None, None] + 3 * np.arange(n)
+    totals = np.zeros(chains * n * 3)
+    weights_sum = np.zeros(chains)
+    squares_sum = np.zeros(chains)
+
+    # Weights are kept relative to the largest seen by each chain, as the
+    # probability of many known traits underflows
+    scale = np.full(chains, -np.inf)
+    for start in range(0, samples, BATCH):
+        size = min(BATCH, samples - start)
+        genes = forward(network, chains * size, rng).reshape(chains, size, n)
+        log_weights = np.log(
+            network["evidence"][np.arange(n), genes]
+        ).sum(axis=-1)
+
+        new_scale = np.maximum(scale, log_weights.max(axis=1))
+        factor = np.exp(scale - new_scale)
+        totals *= np.repeat(factor, 3 * n)
+        weights_sum *= factor
+        squares_sum *= factor ** 2
+        scale = new_scale
+
+        weights = np.exp(log_weights - scale[:, None])
+        totals += np.bincount(
+            (genes + bins).ravel(),
+            weights=np.repeat(weights.ravel(), n),
+            minlength=chains * n * 3
+        )
+        weights_sum += weights.sum(axis=1)
+        squares_sum += (weights ** 2).sum(axis=1)
+
+    estimates = totals.reshape(chains, n, 3) / weights_sum[:, None, None]
+    return estimates, weights_sum ** 2 / squares_sum
+
+
+def gibbs(network, chains, samples, burn_in, rng):
+    """
+    Estimate the gene distributions of every person in each of `chains`
+    chains by Gibbs sampling, resampling each group of `colors` at once
+    from its distribution given everyone else. The first `burn_in`
+    sweeps of each chain are discarded and the next `samples` counted.
+
+    Return a chains x n x 3 array of estimates.
+    """
+    cpts = network["cpts"]
+    links = network["links"]
+    n = len(network["names"])
+    genes = forward(network, chains, rng)
+    counts = np.zeros((chains, n, 3))
+    rows = np.arange(chains)[:, None]
+
+    # For each group, who in it is a founder and which links lead from
+    # its people to their children
+    groups = []
+    for group in network["colors"]:
+        position = np.full(n, -1)
+        position[group] = np.arange(len(group))
+        mine = links[position[links[:, 0]] >= 0]
+        groups.append((
+            group,
+            network["founders"][group],
+            position[mine[:, 0]],
+            mine
+        ))
+
+    for sweep in range(burn_in + samples):
+        for group, founders, positions, mine in groups:
+            # The person's own factor, given their parents
+            p = np.empty((chains, len(group), 3))
+            p[:, founders] = cpts["gene"]
+            children = group[~founders]
+            p[:, ~founders] = cpts["inheritance"][
+                genes[:, network["mothers"][children]],
+                genes[:, network["fathers"][children]]
+            ]
+            p *= network["evidence"][group]
+
+            # The factors of their children, for each possible gene count
+            if len(mine):
+                _, child, other, role = mine.T
+                contribution = network["tables"][
+                    role, :, genes[:, other], genes[:, child]
+                ]
+                log_p = np.log(p)
+                np.add.at(log_p, (rows, positions), np.log(contribution))
+                p = np.exp(log_p - log_p.max(axis=-1, keepdims=True))
+
+            genes[:, group] = draw(p, rng)
+
+        if sweep >= burn_in:
+            counts[rows, np.arange(n), genes] += 1
+
+    return counts / samples
+
+
+# Compiled network of the family being sampled, set once in each worker
+# process
+_network = None
+
+
+def _init_worker(network):
+    global _network
+    _network = network
+
+
+def _run_chains(job):
+    """
+    Run a batch of chains with the method, sizes and seed given in `job`.
+    """
+    method, seed, chains, samples, burn_in = job
+    rng = np.random.default_rng(seed)
+    if method == "gibbs":
+        return gibbs(_network, chains, samples, burn_in, rng), None
+    return likelihood_weighting(_network, chains, samples, rng)
+
+
+def r_hat(estimates, samples):
+    """
+    Return the potential scale reduction factor (Gelman-Rubin) of each
+    person's gene counts, from each chain's estimate of the probability
+    of every gene count, treating each as the mean of an indicator. Values
+    near 1 show chains that agree; gene counts no chain ever visited
+    count as converged.
+    """
+    within = (estimates * (1 - estimates) * samples / (samples - 1)).mean(
+        axis=0
+    )
+    between = samples * estimates.var(axis=0, ddof=1)
+    pooled = (samples - 1) / samples * within + between / samples
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(within > 0, np.sqrt(pooled / within), 1.0)
+    ratio[(within == 0) & (between > 0)] = np.inf
+    return ratio.max(axis=1)
+
+
+def sample_probabilities(people, method="gibbs", samples=SAMPLES,
+                         chains=CHAINS, burn_in=BURN_IN, seed=None,
+                         processes=None, cpts=None):
+    """
+    Estimate the gene and trait distribution of every person in `people`
+    by Gibbs sampling or likelihood weighting (`method` "weighting"),
+    running `chains` independent chains of `samples` samples each in a
+    process pool.
+
+    Return a tuple (probabilities, errors, diagnostics) where
+    `probabilities` has the form returned by
+    `heredity.enumerate_probabilities`, `errors` holds the standard error
+    of each probability, estimated from the spread of the chains and,
+    for likelihood weighting, no smaller than sqrt(p (1 - p) / ESS) for
+    the total effective sample size ESS, and
+    `diagnostics` is a dictionary with:
+        - `r_hat`: the largest Gelman-Rubin statistic of any person
+          (Gibbs sampling), and
+        - `effective_samples`: the total effective sample size of the
+          weighted samples (likelihood weighting).
+    """
+    network = compile_network(people, cpts)
+    chains = max(2, chains)
+    processes = min(processes or os.cpu_count() or 1, chains)
+
+    # Share the chains out between processes, each with its own seed
+    sizes = [len(batch) for batch in np.array_split(range(chains), processes)]
+    seeds = np.random.SeedSequence(seed).spawn(processes)
+    jobs = [
+        (method, child, size, samples, burn_in)
+        for child, size in zip(seeds, sizes)
+    ]
+    if processes == 1:
+        _init_worker(network)
+        results = list(map(_run_chains, jobs))
+    else:
+        with multiprocessing.Pool(
+            processes, initializer=_init_worker, initargs=(network,)
+        ) as pool:
+            results = pool.map(_run_chains, jobs)
+
+    estimates = np.concatenate([estimate for estimate, _ in results])
+    genes = estimates.mean(axis=0)
+    gene_errors = estimates.std(axis=0, ddof=1) / np.sqrt(chains)
+
+    # Traits follow from each chain's gene distributions
+    evidence_traits = network["cpts"]["trait"]
+    chain_traits = estimates @ evidence_traits
+    for i, name in enumerate(network["names"]):
+        trait = people[name]["trait"]
+        if trait is not None:
+            chain_traits[:, i] = [not trait, trait]
+    traits = chain_traits.mean(axis=0)
+    trait_errors = chain_traits.std(axis=0, ddof=1) / np.sqrt(chains)
+
+    if method == "gibbs":
+        diagnostics = {"r_hat": float(r_hat(estimates, samples).max())}
+    else:
+        effective = float(sum(effective.sum() for _, effective in results))
+        diagnostics = {"effective_samples": effective}
+
+        # The chains' spread misses how few samples carry the weight
+        gene_errors = np.maximum(
+            gene_errors, np.sqrt(genes * (1 - genes) / effective)
+        )
+        trait_errors = np.maximum(
+            trait_errors, np.sqrt(traits * (1 - traits) / effective)
+        )
+    names = network["names"]
+    return (
+        to_probabilities(names, genes, traits),
+        to_probabilities(names, gene_errors, trait_errors),
+        diagnostics
+    )
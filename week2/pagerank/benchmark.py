@@ -0,0 +1,181 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from crawler import cached_crawl
+from matrix import (change_edges, converge, edges, power_iteration,
+                    transition_matrix, update_pagerank)
+from pagerank import DAMPING, crawl
+
+# Pages and links per page of the random corpus
+PAGES = 100000
+LINKS = 8
+
+# Fraction of links changed between crawls
+CHANGED = 0.01
+
+# L1 tolerances at which cold and warm starts are compared, and the
+# tolerance of the previous ranks the warm start begins from
+TOLERANCES = [1e-4, 1e-6, 1e-8]
+PREVIOUS_TOLERANCE = 1e-12
+
+# Pages written to disk for the crawl cache benchmark
+CACHE_PAGES = 20000
+FILLER = "Lorem ipsum dolor sit amet. " * 40
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [seed]")
+    random.seed(int(sys.argv[1]) if len(sys.argv) == 2 else 0)
+
+    benchmark_update()
+    print()
+    benchmark_convergence()
+    print()
+    benchmark_cache()
+
+
+def benchmark_update():
+    """
+    Compare recomputing PageRank from a uniform vector with updating the
+    previous ranks after moving a fraction of the links of a random
+    corpus, by the time taken, the edges visited, and how far apart
+    their results are.
+    """
+    corpus = random_corpus(PAGES, LINKS)
+    graph = edges(corpus)
+    pages, sources, targets = graph
+    matrix, dangling = transition_matrix(sources, targets, len(pages))
+    ranks, _ = power_iteration(matrix, dangling, DAMPING,
+                               tolerance=PREVIOUS_TOLERANCE)
+
+    # Move a fraction of the links to new random targets
+    links = [(page, link) for page in corpus for link in corpus[page]]
+    removed = random.sample(links, int(CHANGED * len(links)))
+    added = [(page, random.choice(pages)) for page, _ in removed]
+    print(f"Corpus: {len(pages)} pages, {len(links)} links, "
+          f"{len(removed)} links moved")
+
+    print(f"{'tolerance':>10} {'cold':>25} {'update':>25} {'difference':>10}")
+    for tolerance in TOLERANCES:
+        start = time.perf_counter()
+        (_, new_sources, new_targets), _ = change_edges(
+            graph, added_links=added, removed_links=removed
+        )
+        new_matrix, new_dangling = transition_matrix(
+            new_sources, new_targets, len(pages)
+        )
+        cold, iterations = power_iteration(new_matrix, new_dangling, DAMPING,
+                                           tolerance=tolerance)
+        cold_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, warm, stats = update_pagerank(
+            graph, ranks, DAMPING, added_links=added, removed_links=removed,
+            tolerance=tolerance
+        )
+        warm_time = time.perf_counter() - start
+
+        cold_edges = iterations * len(new_sources)
+        print(f"{tolerance:>10.0e} "
+              f"{cold_edges:>10} edges {cold_time:>7.3f}s "
+              f"{stats['edges']:>10} edges {warm_time:>7.3f}s "
+              f"{abs(cold - warm).sum():>10.1e}")
+
+
+def benchmark_convergence():
+    """
+    Compare the iteration methods and extrapolations of `converge` on a
+    random corpus.
+    """
+    corpus = random_corpus(PAGES, LINKS)
+    pages, sources, targets = edges(corpus)
+    matrix, dangling = transition_matrix(sources, targets, len(pages))
+
+    print(f"{'method':>12} {'extrapolation':>13} {'its':>4} "
+          f"{'ms/it':>7} {'total':>7}  residuals")
+    for method in ("jacobi", "gauss-seidel"):
+        for extrapolation in (None, "aitken", "quadratic"):
+            _, history = converge(matrix, dangling, DAMPING, method=method,
+                                  extrapolation=extrapolation)
+            total = sum(history["times"])
+            residuals = " ".join(
+                f"{residual:.0e}" for residual in history["residuals"][::5]
+            )
+            print(f"{method:>12} {extrapolation or '-':>13} "
+                  f"{history['iterations']:>4} "
+                  f"{1e3 * total / history['iterations']:>7.2f} "
+                  f"{total:>6.3f}s  {residuals}")
+
+
+def benchmark_cache():
+    """
+    Compare startup times of a plain crawl, a crawl that fills the link
+    cache, a crawl with nothing changed, and one after a fraction of the
+    pages were rewritten.
+    """
+    corpus = random_corpus(CACHE_PAGES, LINKS)
+    with tempfile.TemporaryDirectory() as directory:
+        for page, links in corpus.items():
+            write_page(directory, page, links)
+
+        start = time.perf_counter()
+        crawl(directory)
+        print(f"Plain crawl of {len(corpus)} pages: "
+              f"{time.perf_counter() - start:.3f}s")
+
+        def timed(label):
+            start = time.perf_counter()
+            _, _, _, parsed = cached_crawl(directory)
+            print(f"{label}: {time.perf_counter() - start:.3f}s "
+                  f"({parsed} pages parsed)")
+
+        timed("Cold cached crawl")
+        timed("Warm cached crawl")
+
+        pages = random.sample(sorted(corpus), int(CHANGED * len(corpus)))
+        for page in pages:
+            corpus[page].add(random.choice(list(corpus)))
+            write_page(directory, page, corpus[page])
+        timed(f"Warm cached crawl, {len(pages)} pages changed")
+
+
+def write_page(directory, page, links):
+    """
+    Write `page` as an HTML file in `directory` linking to `links`,
+    with a few kilobytes of text around each link.
+    """
+    with open(os.path.join(directory, page), "w") as f:
+        f.write("<html>\n<body>\n")
+        for link in sorted(links):
+            f.write(f"<p>{FILLER}</p>\n")
+            f.write(f'<a href="{link}">{link}</a>\n')
+        f.write("</body>\n</html>\n")
+
+
+def random_corpus(n, links):
+    """
+    Return a corpus of `n` pages named 0.html, 1.html, ... where each
+    page links to up to `links` pages. Most links go to the next few
+    pages and the rest to pages chosen at random, so that, as on real
+    sites, rank spreads slowly through the graph.
+    """
+    pages = [f"{i}.html" for i in range(n)]
+    corpus = dict()
+    for i, page in enumerate(pages):
+        corpus[page] = set()
+        for _ in range(random.randint(0, links)):
+            if random.random() < 0.9:
+                link = pages[(i + random.randint(1, 10)) % n]
+            else:
+                link = random.choice(pages)
+            corpus[page].add(link)
+        corpus[page].discard(page)
+    return corpus
+
+
+if __name__ == "__main__":
+    main()
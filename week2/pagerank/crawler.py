@@ -0,0 +1,324 @@
+import concurrent.futures
+import functools
+import os
+import posixpath
+import re
+
+import numpy as np
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Characters of HTML read at a time
+CHUNK_SIZE = 1 << 16
+
+# Longest unterminated tag carried over from one chunk to the next
+MAX_TAG = 1 << 16
+
+# Pages parsed per task when refreshing the link cache
+BATCH = 256
+
+
+def html_files(directory):
+    """
+    Return the paths of all HTML files under `directory`, in sorted order,
+    relative to it and with "/" as separator. These are the page names.
+    """
+    pages = []
+    for root, dirs, files in os.walk(directory):
+        prefix = os.path.relpath(root, directory).replace(os.sep, "/") + "/"
+        if prefix == "./":
+            prefix = ""
+        for filename in files:
+            if filename.endswith(".html"):
+                pages.append(prefix + filename)
+    return sorted(pages)
+
+
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Return the set of link targets in the HTML file at `path`, reading it
+    a chunk at a time. The end of a chunk that lies inside a tag is kept
+    and searched again together with the next chunk.
+    """
+    links = set()
+    tail = ""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            text = tail + chunk
+            links.update(LINK.findall(text))
+
+            # Carry over a tag that has not been closed yet
+            start = text.rfind("<")
+            if start != -1 and text.find(">", start) == -1:
+                tail = text[start:][-MAX_TAG:]
+            else:
+                tail = ""
+    return links
+
+
+def resolve(page, link):
+    """
+    Return the page name that `link`, found on `page`, points to.
+    """
+    return posixpath.normpath(posixpath.join(posixpath.dirname(page), link))
+
+
+# Directory and page indices of the corpus being crawled, set once in
+# each worker process
+_corpus = None
+
+
+def _init_worker(directory, index):
+    global _corpus
+    _corpus = (directory, index)
+
+
+def _parse(page, directory=None, index=None):
+    """
+    Extract the links of one page and return them as indices of the
+    pages in the corpus, leaving out links to itself or to other sites.
+    """
+    if index is None:
+        directory, index = _corpus
+    links = extract_links(os.path.join(directory, page))
+    i = index[page]
+    targets = {index.get(resolve(page, link)) for link in links}
+    targets.discard(None)
+    targets.discard(i)
+    return i, sorted(targets)
+
+
+def crawl_links(directory, workers=None, processes=False):
+    """
+    Parse every HTML page under `directory`, including subdirectories, in
+    a pool of `workers` threads (or processes if `processes` is True).
+
+    Return a tuple (pages, results) where `pages` lists the page names and
+    `results` yields (page index, list of linked page indices) pairs as
+    pages are parsed.
+    """
+    pages = html_files(directory)
+    index = {page: i for i, page in enumerate(pages)}
+    if processes:
+        executor = concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(directory, index)
+        )
+        parse = _parse
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(workers)
+        parse = functools.partial(_parse, directory=directory, index=index)
+
+    def results():
+        with executor:
+            yield from executor.map(parse, pages, chunksize=64)
+
+    return pages, results()
+
+
+def parallel_crawl(directory, workers=None, processes=False):
+    """
+    Return a corpus dictionary like `crawl`, with pages in subdirectories
+    named by their path relative to `directory`.
+    """
+    pages, results = crawl_links(directory, workers, processes)
+    return {
+        pages[i]: {pages[j] for j in targets}
+        for i, targets in results
+    }
+
+
+def crawl_to_edges(directory, prefix, workers=None, processes=False):
+    """
+    Crawl `directory` and write its link graph to disk, without holding
+    the links of more than one page at a time:
+        - `prefix`.pages lists the page names, one per line, and
+        - `prefix`.edges holds every link as a pair of little-endian
+          32-bit page indices (source, target).
+
+    Return a tuple (pages, edges) with the number of each written.
+    """
+    pages, results = crawl_links(directory, workers, processes)
+    with open(prefix + ".pages", "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page + "\n")
+
+    edges = 0
+    with open(prefix + ".edges", "wb") as f:
+        for i, targets in results:
+            pairs = np.empty((len(targets), 2), dtype="<i4")
+            pairs[:, 0] = i
+            pairs[:, 1] = targets
+            f.write(pairs.tobytes())
+            edges += len(targets)
+    return len(pages), edges
+
+
+def load_edges(prefix):
+    """
+    Load a link graph written by `crawl_to_edges`.
+
+    Return a tuple (pages, sources, targets) like `matrix.edges`, with the
+    edge arrays memory-mapped from `prefix`.edges.
+    """
+    with open(prefix + ".pages", encoding="utf-8") as f:
+        pages = f.read().splitlines()
+    if os.path.getsize(prefix + ".edges") == 0:
+        empty = np.zeros(0, dtype="<i4")
+        return pages, empty, empty
+    pairs = np.memmap(prefix + ".edges", dtype="<i4", mode="r").reshape(-1, 2)
+    return pages, pairs[:, 0], pairs[:, 1]
+
+
+def _parse_batch(pages, directory):
+    """
+    Return, for each page in `pages`, the sorted names of the pages it
+    links to, whether or not they are in the corpus.
+    """
+    results = []
+    for page in pages:
+        links = extract_links(os.path.join(directory, page))
+        results.append(sorted({resolve(page, link) for link in links} - {page}))
+    return results
+
+
+def _read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def _write_lines(path, lines):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def _save(path, array):
+    # Replace rather than overwrite, as the old file may still be mapped
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(path + ".tmp", path)
+
+
+def cached_crawl(directory, cache=None, workers=None):
+    """
+    Crawl `directory` like `crawl_links`, reusing the links of pages that
+    have not changed since the last call.
+
+    The cache, in `cache` (by default a .linkcache directory inside the
+    corpus), records the modification time and size of every page and the
+    names of the pages it links to. Pages whose time or size differ, and
+    new pages, are parsed again in a thread pool. If no page changed, the
+    graph itself is memory-mapped from the cache without further work.
+
+    Return a tuple (pages, sources, targets, parsed) like `load_edges`,
+    where `parsed` is the number of pages that had to be parsed.
+    """
+    cache = cache or os.path.join(directory, ".linkcache")
+    pages = html_files(directory)
+    stats = np.array([
+        (info.st_mtime_ns, info.st_size)
+        for info in (os.stat(os.path.join(directory, page)) for page in pages)
+    ], dtype=np.int64).reshape(-1, 2)
+
+    # Load what was cached by the previous run, if anything
+    try:
+        cached_pages = _read_lines(os.path.join(cache, "pages.txt"))
+        cached_stats = np.load(os.path.join(cache, "stats.npy"))
+        names = _read_lines(os.path.join(cache, "names.txt"))
+        offsets = np.load(os.path.join(cache, "offsets.npy"), mmap_mode="r")
+        links = np.load(os.path.join(cache, "links.npy"), mmap_mode="r")
+        graph = np.load(os.path.join(cache, "graph.npy"), mmap_mode="r")
+    except (OSError, ValueError):
+        cached_pages, cached_stats, names = [], np.zeros((0, 2)), []
+        offsets, links = np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        graph = None
+
+    # Nothing changed: the graph is already on disk
+    if graph is not None and cached_pages == pages \
+            and np.array_equal(cached_stats, stats):
+        return pages, graph[:, 0], graph[:, 1], 0
+
+    # Find pages that are new or whose time or size differ
+    index = {page: i for i, page in enumerate(pages)}
+    previous = {page: i for i, page in enumerate(cached_pages)}
+    changed = [
+        page for page, stat in zip(pages, stats.tolist())
+        if page not in previous
+        or cached_stats[previous[page]].tolist() != stat
+    ]
+    batches = [changed[i:i + BATCH] for i in range(0, len(changed), BATCH)]
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        parse = functools.partial(_parse_batch, directory=directory)
+        parsed = {
+            page: names
+            for batch, results in zip(batches, executor.map(parse, batches))
+            for page, names in zip(batch, results)
+        }
+
+    # Index of each unchanged page in the cache, or -1
+    reused = np.array([
+        -1 if page in parsed else previous[page] for page in pages
+    ], dtype=np.int64)
+    keep = np.flatnonzero(reused >= 0)
+
+    # Lay out the lists of linked names of all pages end to end
+    lengths = np.zeros(len(pages), dtype=np.int64)
+    lengths[keep] = offsets[reused[keep] + 1] - offsets[reused[keep]]
+    for page, targets in parsed.items():
+        lengths[index[page]] = len(targets)
+    new_offsets = np.zeros(len(pages) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    new_links = np.empty(new_offsets[-1], dtype=np.int64)
+
+    # Copy the lists of unchanged pages from the cache in one go
+    counts = lengths[keep]
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    new_links[np.repeat(new_offsets[keep], counts) + within] = (
+        links[np.repeat(offsets[reused[keep]], counts) + within]
+    )
+
+    # Fill in the lists of parsed pages, numbering any new names
+    name_index = {name: i for i, name in enumerate(names)}
+    for page, targets in parsed.items():
+        for name in targets:
+            if name not in name_index:
+                name_index[name] = len(names)
+                names.append(name)
+        start = new_offsets[index[page]]
+        new_links[start:start + len(targets)] = [
+            name_index[name] for name in targets
+        ]
+
+    # Map linked names to pages in the corpus, dropping the others
+    name_pages = np.array([index.get(name, -1) for name in names],
+                          dtype=np.int64)
+    sources = np.repeat(np.arange(len(pages)), np.diff(new_offsets))
+    targets = name_pages[new_links] if len(new_links) else new_links
+    inside = targets >= 0
+    graph = np.stack([sources[inside], targets[inside]], axis=1)
+    graph = graph.astype(np.int32)
+
+    # Write the new cache
+    os.makedirs(cache, exist_ok=True)
+    _write_lines(os.path.join(cache, "pages.txt"), pages)
+    _write_lines(os.path.join(cache, "names.txt"), names)
+    _save(os.path.join(cache, "stats.npy"), stats)
+    _save(os.path.join(cache, "offsets.npy"), new_offsets)
+    _save(os.path.join(cache, "links.npy"), new_links)
+    _save(os.path.join(cache, "graph.npy"), graph)
+
+    return pages, graph[:, 0], graph[:, 1], len(changed)
+
+
+def corpus_from_edges(pages, sources, targets):
+    """
+    Return a corpus dictionary like `crawl` from numbered edges.
+    """
+    corpus = {page: set() for page in pages}
+    for source, target in zip(sources.tolist(), targets.tolist()):
+        corpus[pages[source]].add(pages[target])
+    return corpus
@@ -0,0 +1,492 @@
+import bisect
+import collections
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve_triangular
+
+# Stop iterating once the ranks change by less than this in total (L1 norm)
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 1000
+
+# Factor by which `update_pagerank` lowers its push threshold each time
+# no page is left above it
+PUSH_STEP = 0.5
+
+
+def edges(corpus):
+    """
+    Convert a corpus dictionary into numbered edges.
+
+    Return a tuple (pages, sources, targets) where `pages` lists the pages
+    in sorted order and the i-th link goes from page `sources[i]` to page
+    `targets[i]`, both given as indices into `pages`.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    count = sum(len(links) for links in corpus.values())
+    sources = np.fromiter(
+        (index[page] for page in pages for _ in corpus[page]),
+        dtype=np.int64, count=count
+    )
+    targets = np.fromiter(
+        (index[link] for page in pages for link in corpus[page]),
+        dtype=np.int64, count=count
+    )
+    return pages, sources, targets
+
+
+def outlinks(sources, targets, n):
+    """
+    Group the edges of a graph of `n` pages by source page.
+
+    Return a tuple (offsets, links) where the pages linked to by page i
+    are `links[offsets[i]:offsets[i + 1]]`.
+    """
+    order = np.argsort(sources, kind="stable")
+    links = targets[order]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    return offsets, links
+
+
+def transition_matrix(sources, targets, n):
+    """
+    Build the link matrix of a graph of `n` pages from its edges.
+
+    Return a tuple (matrix, dangling) where `matrix` is an n x n CSR
+    matrix whose entry (i, j) is the probability of following a link from
+    page j to page i, and `dangling` is a boolean array marking pages with
+    no links, which a random surfer leaves for any page at random.
+    """
+    degree = np.bincount(sources, minlength=n)
+    weights = 1 / degree[sources]
+    matrix = sparse.csr_matrix((weights, (targets, sources)), shape=(n, n))
+    return matrix, degree == 0
+
+
+def power_iteration(matrix, dangling, damping_factor, ranks=None,
+                    tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Iterate the PageRank formula as sparse matrix-vector products,
+    starting from `ranks` (uniform if None), until the ranks change by
+    less than `tolerance` in total.
+
+    Return a tuple (ranks, iterations).
+    """
+    ranks, history = converge(matrix, dangling, damping_factor, ranks=ranks,
+                              tolerance=tolerance,
+                              max_iterations=max_iterations)
+    return ranks, history["iterations"]
+
+
+def converge(matrix, dangling, damping_factor, ranks=None, method="jacobi",
+             extrapolation=None, every=10, tolerance=TOLERANCE,
+             max_iterations=MAX_ITERATIONS):
+    """
+    Solve for the PageRank vector of the graph given by `matrix` and
+    `dangling` (see `transition_matrix`), starting from `ranks` (uniform
+    if None), until the ranks change by less than `tolerance` in total.
+
+    `method` is either
+        - "jacobi": every page is updated from the previous ranks, or
+        - "gauss-seidel": pages are updated in order, each from the ranks
+          already updated in the same sweep, by a triangular solve.
+    `extrapolation` may be "aitken" or "quadratic" to extrapolate the
+    ranks towards their limit from the last iterates once every `every`
+    iterations.
+
+    Return a tuple (ranks, history) where `history` is a dictionary with
+    the number of "iterations" and lists of the "residuals" (L1 change)
+    and "times" (seconds) of each iteration.
+    """
+    if method not in ("jacobi", "gauss-seidel"):
+        raise ValueError(f"unknown method {method!r}")
+    if extrapolation not in (None, "aitken", "quadratic"):
+        raise ValueError(f"unknown extrapolation {extrapolation!r}")
+
+    n = matrix.shape[0]
+    if ranks is None:
+        ranks = np.full(n, 1 / n)
+    teleport = (1 - damping_factor) / n
+
+    if method == "gauss-seidel":
+        # (I - d L) x_new = teleport + d (U x + spread), where L and U are
+        # the lower (with diagonal) and strictly upper parts of the matrix
+        lower = (sparse.identity(n, format="csr")
+                 - damping_factor * sparse.tril(matrix, format="csr"))
+        upper = sparse.triu(matrix, k=1, format="csr")
+
+    def step(ranks):
+        # Rank of dangling pages is spread evenly over every page
+        spread = ranks[dangling].sum() / n
+        if method == "jacobi":
+            return teleport + damping_factor * (matrix @ ranks + spread)
+        new_ranks = spsolve_triangular(
+            lower, teleport + damping_factor * (upper @ ranks + spread),
+            lower=True
+        )
+        return new_ranks / new_ranks.sum()
+
+    history = {"iterations": 0, "residuals": [], "times": []}
+    iterates = []
+    for iteration in range(1, max_iterations + 1):
+        start = time.perf_counter()
+        new_ranks = step(ranks)
+        iterates = (iterates + [ranks])[-3:]
+
+        # Jump to the extrapolated limit only if it is closer to a fixed
+        # point than the plain iterate
+        if extrapolation and iteration % every == 0:
+            candidate = extrapolate(iterates + [new_ranks], extrapolation)
+            after = step(candidate)
+            if np.abs(after - candidate).sum() < np.abs(new_ranks - ranks).sum():
+                ranks, new_ranks = candidate, after
+
+        residual = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        history["iterations"] = iteration
+        history["residuals"].append(float(residual))
+        history["times"].append(time.perf_counter() - start)
+        if residual < tolerance:
+            break
+
+    return ranks, history
+
+
+def extrapolate(iterates, method):
+    """
+    Estimate the limit of a sequence of rank vectors from its last
+    `iterates`, by component-wise Aitken extrapolation over the last
+    three or by quadratic extrapolation over the last four. The
+    iterates are returned unchanged if there are too few of them.
+    """
+    if method == "aitken" and len(iterates) >= 3:
+        x0, x1, x2 = iterates[-3:]
+        step = x2 - x1
+        curvature = x2 - 2 * x1 + x0
+        safe = np.abs(curvature) > 1e-15
+        ranks = x2.copy()
+        ranks[safe] -= step[safe] ** 2 / curvature[safe]
+    elif method == "quadratic" and len(iterates) >= 4:
+        x0, x1, x2, x3 = iterates[-4:]
+        y = np.stack([x1 - x0, x2 - x0], axis=1)
+        gamma, *_ = np.linalg.lstsq(y, -(x3 - x0), rcond=None)
+        g1, g2, g3 = gamma[0], gamma[1], 1
+        ranks = (g1 + g2 + g3) * x1 + (g2 + g3) * x2 + g3 * x3
+    else:
+        return iterates[-1]
+
+    # Extrapolation can overshoot; keep a valid probability distribution
+    ranks = np.maximum(ranks, 0)
+    return ranks / ranks.sum()
+
+
+def sparse_pagerank(corpus, damping_factor, tolerance=TOLERANCE):
+    """
+    Return PageRank values for each page, like `iterate_pagerank`, by
+    power iteration over a sparse transition matrix built once.
+
+    Pages without links are treated as linking to every page in the
+    corpus, including themselves.
+    """
+    pages, sources, targets = edges(corpus)
+    matrix, dangling = transition_matrix(sources, targets, len(pages))
+    ranks, _ = power_iteration(matrix, dangling, damping_factor,
+                               tolerance=tolerance)
+    return dict(zip(pages, ranks.tolist()))
+
+
+def change_edges(graph, added_pages=(), removed_pages=(), added_links=(),
+                 removed_links=()):
+    """
+    Apply a change to a graph given as (pages, sources, targets), as
+    returned by `edges`, without going back to a corpus dictionary: pages
+    are added and removed, and the links given as (page, linked page)
+    pairs are added and removed. Links to removed pages and links to pages
+    outside the graph are dropped.
+
+    Return a tuple (graph, position) where `graph` is the changed graph,
+    with its pages still sorted, and `position[i]` is the index in it of
+    the i-th page of the old graph, or -1 if that page was removed.
+    """
+    pages, sources, targets = graph
+
+    def find(names, name):
+        # Index of `name` in the sorted list `names`, or -1
+        i = bisect.bisect_left(names, name)
+        return i if i < len(names) and names[i] == name else -1
+
+    # Pages are sorted, so they are found by bisection and spliced in
+    # and out without touching every page in Python
+    gone = sorted({find(pages, page) for page in removed_pages} - {-1})
+    new = []
+    for start, end in zip([-1] + gone, gone + [len(pages)]):
+        new.extend(pages[start + 1:end])
+    kept = np.ones(len(pages), dtype=bool)
+    kept[gone] = False
+    shifts = []
+    for page in sorted(set(added_pages) - set(removed_pages)):
+        if find(new, page) < 0:
+            shifts.append(bisect.bisect_left(new, page) - len(shifts))
+            new.insert(shifts[-1] + len(shifts) - 1, page)
+    n = len(new)
+
+    position = np.cumsum(kept) - 1
+    position += np.searchsorted(np.array(shifts, dtype=np.int64), position,
+                                side="right")
+    position[~kept] = -1
+
+    def lookup(names):
+        # Index of each name in the new pages, or -1
+        return np.fromiter((find(new, name) for name in names),
+                           dtype=np.int64)
+
+    def link_keys(pairs):
+        # Edge keys of the links between pages of the new graph
+        pairs = list(pairs)
+        source = lookup(page for page, _ in pairs)
+        target = lookup(link for _, link in pairs)
+        valid = (source >= 0) & (target >= 0) & (source != target)
+        return source[valid] * n + target[valid]
+
+    # Edges are kept sorted by source and then target, as keys
+    sources, targets = position[sources], position[targets]
+    keep = (sources >= 0) & (targets >= 0)
+    keys = np.sort(sources[keep] * n + targets[keep])
+    removed = link_keys(removed_links)
+    keys = np.delete(keys, np.searchsorted(keys, removed)[
+        _contains(keys, removed)
+    ])
+
+    added = np.unique(link_keys(added_links))
+    added = added[~_contains(keys, added)]
+    keys = np.insert(keys, np.searchsorted(keys, added), added)
+    return (new, keys // n, keys % n), position
+
+
+def _contains(keys, values):
+    """
+    Return a boolean array marking which of `values` are in the sorted
+    array `keys`.
+    """
+    if not len(keys):
+        return np.zeros(len(values), dtype=bool)
+    index = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+    return keys[index] == values
+
+
+def update_pagerank(graph, ranks, damping_factor, added_pages=(),
+                    removed_pages=(), added_links=(), removed_links=(),
+                    tolerance=TOLERANCE):
+    """
+    Update PageRank values after a change to a graph given as (pages,
+    sources, targets), as returned by `edges`, by pushing out only the
+    error the change introduces, as `push_pagerank` does.
+
+    `ranks` holds the previous PageRank values of the pages, converged to
+    well within `tolerance`. They solve x = t + d M x for teleport t and
+    link matrix M closely enough that the residual r = t + d M' x - x of
+    the changed matrix M' is nonzero only next to the pages whose links
+    changed, apart from terms that are the same on every page. Those
+    terms, like the rank lost to pages without links, only add a multiple
+    of the new PageRank vector to the correction, so they are left out
+    and the result is normalized. Residual is pushed along links until at
+    most `tolerance` of it is left in total.
+
+    Return a tuple (graph, ranks, stats) with the changed graph, its
+    PageRank values as an array, and a dictionary with the number of
+    "rounds" of pushes and of "edges" pushed along.
+    """
+    old_sources, old_targets = graph[1], graph[2]
+    graph, position = change_edges(graph, added_pages, removed_pages,
+                                   added_links, removed_links)
+    pages, sources, targets = graph
+    n = len(pages)
+    old_n = len(position)
+    ranks = np.asarray(ranks, dtype=float)
+    old_degree = np.bincount(old_sources, minlength=old_n)
+    degree = np.bincount(sources, minlength=n)
+
+    # Previous ranks on the changed graph, new pages starting at 0
+    start = np.zeros(n)
+    start[position[position >= 0]] = ranks[position >= 0]
+
+    # Pages whose links changed: their own links were added or removed,
+    # they linked to a removed page, or they were removed themselves
+    old_keys = np.where(
+        (position[old_sources] >= 0) & (position[old_targets] >= 0),
+        position[old_sources] * n + position[old_targets], -1
+    )
+    keys = sources * n + targets
+    lost = position[old_sources[~_contains(keys, old_keys)]]
+    changed_new = np.zeros(n, dtype=bool)
+    changed_new[lost[lost >= 0]] = True
+    changed_new[sources[~_contains(np.sort(old_keys), keys)]] = True
+    changed = position < 0
+    changed[position >= 0] = changed_new[position[position >= 0]]
+
+    # Residual of the previous ranks: what the changed pages now pass
+    # along their links, less what they passed before, and on new pages
+    # the share of teleport and dangling rank every old page received
+    residual = np.zeros(n)
+    mine = changed[old_sources] & (position[old_targets] >= 0)
+    residual -= damping_factor * np.bincount(
+        position[old_targets[mine]],
+        weights=ranks[old_sources[mine]] / old_degree[old_sources[mine]],
+        minlength=n
+    )
+    mine = changed_new[sources]
+    residual += damping_factor * np.bincount(
+        targets[mine],
+        weights=start[sources[mine]] / degree[sources[mine]],
+        minlength=n
+    )
+    added = np.ones(n, dtype=bool)
+    added[position[position >= 0]] = False
+    residual[added] += ((1 - damping_factor) / old_n + damping_factor
+                        * ranks[old_degree == 0].sum() / old_n)
+
+    # Push the pages holding the most residual per link first: lower a
+    # threshold on residual per link step by step, at each step pushing
+    # every page above it, all at once, until none is left. Only pages
+    # whose residual changed can newly exceed the threshold.
+    offsets, links = outlinks(sources, targets, n)
+    width = np.maximum(degree, 1)
+    final = tolerance / max(len(links) + n, 1)
+    level = max(PUSH_STEP * np.abs(residual / width).max(initial=0),
+                final)
+    candidates = np.flatnonzero(residual)
+    correction = np.zeros(n)
+    stats = {"rounds": 0, "edges": 0}
+    while True:
+        active = candidates[
+            np.abs(residual[candidates]) > level * width[candidates]
+        ]
+        if not len(active):
+            if level <= final:
+                break
+            level = max(PUSH_STEP * level, final)
+            candidates = np.flatnonzero(residual)
+            continue
+        mass = residual[active]
+        correction[active] += mass
+        residual[active] = 0
+
+        # Spread d times the mass of each page evenly over its links
+        counts = degree[active]
+        total = int(counts.sum())
+        first = np.repeat(offsets[active] - np.cumsum(counts) + counts,
+                          counts)
+        candidates, inverse = np.unique(links[first + np.arange(total)],
+                                        return_inverse=True)
+        residual[candidates] += np.bincount(
+            inverse,
+            weights=np.repeat(damping_factor * mass / width[active], counts),
+            minlength=len(candidates)
+        )
+        stats["rounds"] += 1
+        stats["edges"] += total
+
+    new_ranks = start + correction
+    return graph, new_ranks / new_ranks.sum(), stats
+
+
+def batch_power_iteration(matrix, dangling, damping_factor, teleport,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Compute one personalized PageRank vector per column of `teleport`, an
+    n x k array whose columns are probability distributions over the
+    pages a surfer jumps to, by iterating all k vectors together against
+    the same sparse matrix. Surfers on pages without links jump as they
+    would when not following a link.
+
+    Return a tuple (ranks, iterations) where `ranks` is an n x k array,
+    once every column changes by less than `tolerance` in total.
+    """
+    ranks = teleport.copy()
+    for iteration in range(1, max_iterations + 1):
+        lost = ranks[dangling].sum(axis=0)
+        new_ranks = damping_factor * (matrix @ ranks + teleport * lost)
+        new_ranks += (1 - damping_factor) * teleport
+        residual = np.abs(new_ranks - ranks).sum(axis=0).max()
+        ranks = new_ranks
+        if residual < tolerance:
+            break
+    return ranks, iteration
+
+
+def personalized_pagerank(corpus, damping_factor, seeds, tolerance=TOLERANCE):
+    """
+    Return PageRank values biased towards each of several sets of pages.
+
+    `seeds` maps a name (a topic or user, say) to the pages that a surfer
+    jumps to, at random, instead of to any page in the corpus. Return a
+    dictionary mapping each name to a dictionary of PageRank values.
+    """
+    pages, sources, targets = edges(corpus)
+    n = len(pages)
+    index = {page: i for i, page in enumerate(pages)}
+    matrix, dangling = transition_matrix(sources, targets, n)
+
+    names = list(seeds)
+    teleport = np.zeros((n, len(names)))
+    for column, name in enumerate(names):
+        rows = [index[page] for page in seeds[name]]
+        if not rows:
+            raise ValueError(f"no seed pages for {name!r}")
+        teleport[rows, column] = 1 / len(rows)
+
+    ranks, _ = batch_power_iteration(matrix, dangling, damping_factor,
+                                     teleport, tolerance=tolerance)
+    return {
+        name: dict(zip(pages, ranks[:, column].tolist()))
+        for column, name in enumerate(names)
+    }
+
+
+def push_pagerank(offsets, links, damping_factor, seeds, epsilon=1e-6):
+    """
+    Approximate the PageRank values biased towards the pages `seeds`
+    (page indices) by pushing probability from the seeds along links,
+    touching only the pages near them.
+
+    Every page holds a settled rank and a residual still to be spread. A
+    page whose residual exceeds `epsilon` times its number of links keeps
+    1 - d of it and passes the rest on, split evenly between its links
+    (or between the seeds, if it has none). The error on each page is
+    then at most about `epsilon` times its number of links.
+
+    Return a dictionary mapping the index of every page reached to its
+    approximate rank; ranks are normalized to sum to 1.
+    """
+    seeds = list(seeds)
+    degree = np.diff(offsets)
+    ranks = dict()
+    residual = {seed: 1 / len(seeds) for seed in seeds}
+    queue = collections.deque(seeds)
+
+    while queue:
+        page = queue.popleft()
+        mass = residual.get(page, 0)
+        count = int(degree[page])
+        if mass <= epsilon * max(count, 1):
+            continue
+        residual[page] = 0
+        ranks[page] = ranks.get(page, 0) + (1 - damping_factor) * mass
+
+        if count:
+            targets = links[offsets[page]:offsets[page + 1]].tolist()
+        else:
+            targets = seeds
+        share = damping_factor * mass / len(targets)
+        for target in targets:
+            before = residual.get(target, 0)
+            residual[target] = before + share
+            threshold = epsilon * max(int(degree[target]), 1)
+            if before <= threshold < before + share:
+                queue.append(target)
+
+    total = sum(ranks.values())
+    return {page: rank / total for page, rank in ranks.items()}
@@ -0,0 +1,110 @@
+import mmap
+import os
+import sys
+
+import numpy as np
+
+from matrix import MAX_ITERATIONS, TOLERANCE
+from pagerank import DAMPING
+
+# Edges read from the edge file at a time
+BLOCK = 1 << 22
+
+# Pages listed by the command line
+TOP = 10
+
+
+def count_pages(prefix):
+    """
+    Return the number of pages listed in `prefix`.pages, reading it a
+    line at a time.
+    """
+    with open(prefix + ".pages", encoding="utf-8") as f:
+        return sum(1 for _ in f)
+
+
+def edge_blocks(prefix, block=BLOCK):
+    """
+    Memory-map the edge file `prefix`.edges written by
+    `crawler.crawl_to_edges` and yield its edges as (sources, targets)
+    arrays of at most `block` edges each, so that only one block needs to
+    be in memory at a time.
+    """
+    if os.path.getsize(prefix + ".edges") == 0:
+        return
+    with open(prefix + ".edges", "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            edges = len(data) // 8
+            for start in range(0, edges, block):
+                count = min(block, edges - start)
+                # Copy the block, as the map cannot close while viewed
+                pairs = np.frombuffer(data, dtype="<i4", count=2 * count,
+                                      offset=8 * start).reshape(-1, 2)
+                yield pairs[:, 0].copy(), pairs[:, 1].copy()
+                del pairs
+
+
+def stream_pagerank(prefix, damping_factor, tolerance=TOLERANCE,
+                    block=BLOCK, max_iterations=MAX_ITERATIONS):
+    """
+    Compute PageRank over the graph in `prefix`.pages and `prefix`.edges
+    without loading its edges into memory.
+
+    Every iteration streams over the edge file in blocks of `block`
+    edges, so that only the out-degrees and the old and new ranks, one
+    number per page each, are held in memory. Pages without links are
+    treated as linking to every page in the corpus, including themselves.
+    Iteration stops once the ranks change by less than `tolerance` in
+    total.
+
+    Return a tuple (ranks, iterations) where `ranks[i]` is the PageRank
+    value of the i-th page in `prefix`.pages.
+    """
+    n = count_pages(prefix)
+
+    # One pass to count the links of every page
+    degree = np.zeros(n, dtype=np.int64)
+    for sources, _ in edge_blocks(prefix, block):
+        degree += np.bincount(sources, minlength=n)
+    dangling = degree == 0
+    share = np.zeros(n)
+    share[~dangling] = 1 / degree[~dangling]
+
+    ranks = np.full(n, 1 / n)
+    for iteration in range(1, max_iterations + 1):
+        # Rank each page passes on along every one of its links
+        passed = ranks * share
+        new_ranks = np.zeros(n)
+        for sources, targets in edge_blocks(prefix, block):
+            new_ranks += np.bincount(targets, weights=passed[sources],
+                                     minlength=n)
+        new_ranks += ranks[dangling].sum() / n
+        new_ranks = (1 - damping_factor) / n + damping_factor * new_ranks
+
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+    return ranks, iteration
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python outofcore.py prefix [top]")
+    prefix = sys.argv[1]
+    top = int(sys.argv[2]) if len(sys.argv) == 3 else TOP
+
+    ranks, iterations = stream_pagerank(prefix, DAMPING)
+    best = np.argsort(-ranks, kind="stable")[:top].tolist()
+    wanted = set(best)
+    with open(prefix + ".pages", encoding="utf-8") as f:
+        names = {
+            i: line.rstrip("\n") for i, line in enumerate(f) if i in wanted
+        }
+    print(f"PageRank Results from Streaming ({iterations} iterations)")
+    for i in best:
+        print(f"  {names[i]}: {ranks[i]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
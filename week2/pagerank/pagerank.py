@@ -2,19 +2,44 @@ import os
 import random
 import re
 import sys
+import time
 
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
-    for page in sorted(ranks):
-        print(f"  {page}: {ranks[page]:.4f}")
+    args = sys.argv[1:]
+    cache = "--cache" in args
+    if cache:
+        args.remove("--cache")
+    if len(args) not in [1, 2]:
+        sys.exit("Usage: python pagerank.py [--cache] corpus [tolerance]")
+    if cache:
+        # Only parse pages that changed since the last cached crawl
+        from crawler import cached_crawl, corpus_from_edges
+        start = time.perf_counter()
+        pages, sources, targets, parsed = cached_crawl(args[0])
+        corpus = corpus_from_edges(pages, sources, targets)
+        print(f"Crawled {len(pages)} pages ({parsed} parsed) "
+              f"in {time.perf_counter() - start:.3f}s")
+    else:
+        corpus = crawl(args[0])
+    if len(args) == 2:
+        # Sample in parallel until every estimate is within the tolerance
+        from sampling import parallel_sample_pagerank
+        tolerance = float(args[1])
+        ranks, errors, samples = parallel_sample_pagerank(
+            corpus, DAMPING, tolerance
+        )
+        print(f"PageRank Results from Parallel Sampling (n = {samples})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f} ± {errors[page]:.4f}")
+    else:
+        ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+        print(f"PageRank Results from Sampling (n = {SAMPLES})")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
     ranks = iterate_pagerank(corpus, DAMPING)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
@@ -62,6 +87,10 @@ def transition_model(corpus, page, damping_factor):
     num_links = len(links)
     num_pages = len(all_pages)
 
+    # A page without links is treated as linking to every page
+    if num_links == 0:
+        return {apage: 1 / num_pages for apage in all_pages}
+
     transition_prob = dict()
 
     constant_prob = round((1 - damping_factor) / num_pages, 4)
@@ -111,7 +140,6 @@ def sample_pagerank(corpus, damping_factor, n):
         samples.append(current_page)
     
     page_rank = dict()
-    print(samples.count("bfs.html"))
     for page in all_pages:
         page_rank[page] = round(samples.count(page) / n, 3)
     
@@ -140,7 +168,10 @@ def iterate_pagerank(corpus, damping_factor):
                     incoming.add(other_page)
         incoming_links[page] = incoming
     
-    constant = round(1 / len(all_pages), 4)
+    # Pages without links are treated as linking to every page
+    dangling = [page for page in all_pages if not corpus[page]]
+
+    constant = 1 / len(all_pages)
 
     # Starting page rank
     pagerank = {page:constant for page in all_pages}
@@ -148,30 +179,31 @@ def iterate_pagerank(corpus, damping_factor):
     # lets break down PR(p) = X + d * Y
     # X = (1-d)/ N and Y = sum(PR(i)/num_links)
 
-    X = round((1-damping_factor)/len(all_pages), 4)
+    X = (1-damping_factor)/len(all_pages)
 
     # Start while loop here 
     while(True):
         new_pagerank = dict()
 
+        # Share of every page in the rank of dangling pages
+        spread = sum(pagerank[page] for page in dangling) / len(all_pages)
+
         for page in all_pages:
-            Y = 0
+            Y = spread
             for incoming in incoming_links[page]:
                 num_links = len(corpus[incoming])
                 Y += pagerank[incoming] / num_links
             
-            # print(page, Y)
-            
             new_pagerank[page] = X + damping_factor * Y
 
         old_ranks = pagerank.values()
         new_ranks = new_pagerank.values()
 
-        diff = min(abs(i -j) for i, j in zip(old_ranks, new_ranks))
+        # Stop once the ranks of all pages together change by little
+        diff = sum(abs(i -j) for i, j in zip(old_ranks, new_ranks))
 
         if diff < 0.0001:
             return new_pagerank
-            break 
 
         pagerank = new_pagerank
 
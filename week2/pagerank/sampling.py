@@ -0,0 +1,184 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from matrix import edges, outlinks
+
+# Surfers moved in lockstep when no number is given
+WALKERS = 1000
+
+# Fewest steps each surfer takes, so that chains forget their start
+MIN_STEPS = 100
+
+# Visits buffered before being added to the counts
+BUFFER = 1 << 16
+
+# Steps each surfer takes per round of parallel sampling
+ROUND_STEPS = 100
+
+# Independent chains of parallel sampling, whatever the number of
+# processes running them, so that their spread gives a usable error
+CHAINS = 8
+
+# Stop parallel sampling after this many samples even if not converged
+MAX_SAMPLES = 10 ** 9
+
+
+def walk(offsets, links, damping_factor, steps, walkers, rng, start=None):
+    """
+    Move `walkers` independent random surfers `steps` times each.
+
+    At every step a surfer follows a random link of its current page with
+    probability `damping_factor`, and otherwise, or if the page has no
+    links, jumps to a page chosen at random from the whole corpus.
+    Surfers start on random pages unless `start` gives their positions.
+
+    Return a tuple (counts, positions) where `counts[i]` is the number of
+    visits to page i, the starting pages included, and `positions` holds
+    the page each surfer ended on.
+    """
+    n = len(offsets) - 1
+    degree = np.diff(offsets)
+    if start is None:
+        current = rng.integers(n, size=walkers)
+    else:
+        current = np.asarray(start)
+    counts = np.zeros(n, dtype=np.int64)
+
+    # Record visits in a small buffer and count them a block at a time
+    block = max(1, BUFFER // walkers)
+    visits = np.empty((block, walkers), dtype=np.int64)
+    visits[0] = current
+    filled = 1
+
+    for _ in range(steps - 1):
+        if filled == block:
+            counts += np.bincount(visits.ravel(), minlength=n)
+            filled = 0
+
+        outdegree = degree[current]
+        follow = (rng.random(walkers) < damping_factor) & (outdegree > 0)
+
+        # Jump to a random page, or follow a random link of the surfers'
+        # current pages if the corpus has any
+        jumped = rng.integers(n, size=walkers)
+        if len(links):
+            choice = (rng.random(walkers) * outdegree).astype(np.int64)
+            followed = links[
+                np.minimum(offsets[current] + choice, len(links) - 1)
+            ]
+            current = np.where(follow, followed, jumped)
+        else:
+            current = jumped
+        visits[filled] = current
+        filled += 1
+
+    counts += np.bincount(visits[:filled].ravel(), minlength=n)
+    return counts, current
+
+
+def vector_sample_pagerank(corpus, damping_factor, n, walkers=WALKERS,
+                           seed=None):
+    """
+    Return PageRank values for each page, like `sample_pagerank`, by
+    counting the visits of `walkers` random surfers moving in lockstep
+    until `n` pages have been sampled between them. Fewer surfers are used
+    if that is needed for each to take at least `MIN_STEPS` steps.
+
+    Pages without links are treated as linking to every page in the
+    corpus, including themselves.
+    """
+    pages, sources, targets = edges(corpus)
+    offsets, links = outlinks(sources, targets, len(pages))
+    rng = np.random.default_rng(seed)
+
+    walkers = max(1, min(walkers, n // MIN_STEPS))
+    steps = -(-n // walkers)
+    counts, _ = walk(offsets, links, damping_factor, steps, walkers, rng)
+    ranks = counts / counts.sum()
+    return dict(zip(pages, ranks.tolist()))
+
+
+# Link arrays of the corpus, set once in each worker process
+_graph = None
+
+
+def _init_worker(offsets, links, damping_factor):
+    global _graph
+    _graph = (offsets, links, damping_factor)
+
+
+def _run_chain(job):
+    """
+    Continue one chain of surfers for a round, from the positions and
+    with the seed given in `job`. Return its visit counts and positions.
+    """
+    seed, positions, steps = job
+    offsets, links, damping_factor = _graph
+    rng = np.random.default_rng(seed)
+
+    # Surfers carry on from where they stopped, a visit already counted
+    counts, end = walk(offsets, links, damping_factor, steps + 1,
+                       len(positions), rng, start=positions)
+    counts -= np.bincount(positions, minlength=len(counts))
+    return counts, end
+
+
+def parallel_sample_pagerank(corpus, damping_factor, tolerance, chains=CHAINS,
+                             walkers=WALKERS, seed=None,
+                             max_samples=MAX_SAMPLES):
+    """
+    Estimate PageRank values by running independent chains of random
+    surfers in a process pool, in rounds of `ROUND_STEPS` steps, until the
+    standard error of every page's estimate is below `tolerance`.
+
+    Each chain has its own seed and `walkers` surfers, and each process
+    runs several chains if there are more chains than CPUs. The standard
+    error of a page is estimated from the spread of the chains' own
+    estimates.
+
+    Return a tuple (ranks, errors, samples) where `ranks` and `errors` map
+    each page to its estimated PageRank value and standard error, and
+    `samples` is the total number of pages sampled.
+    """
+    pages, sources, targets = edges(corpus)
+    n = len(pages)
+    offsets, links = outlinks(sources, targets, n)
+
+    chains = max(2, chains)
+    seeds = np.random.SeedSequence(seed)
+    start = np.random.default_rng(seeds.spawn(1)[0])
+    positions = [start.integers(n, size=walkers) for _ in range(chains)]
+    counts = np.zeros((chains, n), dtype=np.int64)
+
+    with multiprocessing.Pool(
+        min(chains, os.cpu_count() or 1),
+        initializer=_init_worker,
+        initargs=(offsets, links, damping_factor)
+    ) as pool:
+        while True:
+            jobs = [
+                (child, position, ROUND_STEPS)
+                for child, position in zip(seeds.spawn(chains), positions)
+            ]
+            positions = []
+            for chain, (chain_counts, position) in enumerate(
+                pool.map(_run_chain, jobs)
+            ):
+                counts[chain] += chain_counts
+                positions.append(position)
+
+            # Spread of the chains' estimates around their mean
+            estimates = counts / counts.sum(axis=1, keepdims=True)
+            errors = estimates.std(axis=0, ddof=1) / np.sqrt(chains)
+            samples = int(counts.sum())
+            if errors.max() < tolerance or samples >= max_samples:
+                break
+
+    ranks = counts.sum(axis=0) / samples
+    return (
+        dict(zip(pages, ranks.tolist())),
+        dict(zip(pages, errors.tolist())),
+        samples
+    )
@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+
+from crawler import cached_crawl, parallel_crawl
+from matrix import converge, edges, sparse_pagerank, transition_matrix
+from outofcore import stream_pagerank
+from pagerank import (DAMPING, SAMPLES as PYTHON_SAMPLES, crawl,
+                      iterate_pagerank, sample_pagerank)
+from sampling import parallel_sample_pagerank, vector_sample_pagerank
+from webgraph import (DANGLING, EXPONENT, LINKS, scale_free_graph,
+                      write_edges, write_html)
+
+# Largest corpus on which the pure Python implementations, which take
+# time quadratic in the number of pages, are run
+PYTHON_LIMIT = 2000
+
+# Samples drawn by the vectorized sampling methods, and the standard
+# error at which parallel sampling stops
+SAMPLES = 10 ** 6
+SAMPLE_TOLERANCE = 1e-4
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark crawling, sampling and iteration on "
+                    "generated scale-free corpora."
+    )
+    parser.add_argument("-n", "--pages", type=int, action="append",
+                        help="corpus size in pages (repeatable)")
+    parser.add_argument("-l", "--links", type=float, default=LINKS)
+    parser.add_argument("-e", "--exponent", type=float, default=EXPONENT)
+    parser.add_argument("-d", "--dangling", type=float, default=DANGLING)
+    parser.add_argument("-s", "--samples", type=int, default=SAMPLES,
+                        help="samples drawn by the vectorized samplers")
+    parser.add_argument("--python-limit", type=int, default=PYTHON_LIMIT,
+                        help="largest corpus for the pure Python methods")
+    parser.add_argument("-o", "--output", default="benchmark.json",
+                        help="file the results are written to")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "damping": DAMPING,
+        "links": args.links,
+        "exponent": args.exponent,
+        "dangling": args.dangling,
+        "samples": args.samples,
+        "python_samples": PYTHON_SAMPLES,
+        "corpora": []
+    }
+    for n in args.pages or [1000, 10000, 100000]:
+        result = benchmark(n, args)
+        results["corpora"].append(result)
+        report(result)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def benchmark(n, args):
+    """
+    Generate a corpus of `n` pages, write it to disk, and time how long
+    each method takes to crawl it and to compute its PageRank.
+
+    Return a dictionary with the size of the corpus and, for every method
+    that was run, its time in seconds and the distance of its ranks from
+    a reference computed to near machine precision.
+    """
+    pages, sources, targets = scale_free_graph(
+        n, args.links, args.exponent, args.dangling, args.seed
+    )
+    result = {
+        "pages": n,
+        "links": len(sources),
+        "dangling": int(n - len(np.unique(sources))),
+        "crawl": {},
+        "rank": {}
+    }
+    python = n <= args.python_limit
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_html(directory, pages, sources, targets)
+        prefix = os.path.join(directory, ".graph")
+        write_edges(prefix, pages, sources, targets)
+
+        crawlers = {
+            "parallel_crawl": lambda: parallel_crawl(directory),
+            "cached_crawl": lambda: cached_crawl(directory)
+        }
+        if python:
+            crawlers["crawl"] = lambda: crawl(directory)
+        for name, method in crawlers.items():
+            start = time.perf_counter()
+            method()
+            result["crawl"][name] = {"seconds": time.perf_counter() - start}
+
+        # Check that the corpus read back is the one generated
+        corpus = parallel_crawl(directory)
+        _, crawled_sources, crawled_targets = edges(corpus)
+        result["crawl_matches"] = bool(np.array_equal(
+            np.unique(crawled_sources * n + crawled_targets),
+            sources * n + targets
+        ))
+
+        matrix, dangling = transition_matrix(sources, targets, n)
+        reference, _ = converge(matrix, dangling, DAMPING, tolerance=1e-14)
+        result["rank"]["stream_pagerank"] = rank(
+            lambda: dict(zip(pages, stream_pagerank(prefix, DAMPING)[0])),
+            pages, reference
+        )
+
+    methods = {
+        "sparse_pagerank": lambda: sparse_pagerank(corpus, DAMPING),
+        "vector_sample_pagerank": lambda: vector_sample_pagerank(
+            corpus, DAMPING, args.samples, seed=args.seed
+        ),
+        "parallel_sample_pagerank": lambda: parallel_sample_pagerank(
+            corpus, DAMPING, SAMPLE_TOLERANCE, seed=args.seed,
+            max_samples=args.samples
+        )[0]
+    }
+    if python:
+        methods["iterate_pagerank"] = lambda: iterate_pagerank(
+            corpus, DAMPING
+        )
+        methods["sample_pagerank"] = lambda: sample_pagerank(
+            corpus, DAMPING, PYTHON_SAMPLES
+        )
+    for name, method in methods.items():
+        result["rank"][name] = rank(method, pages, reference)
+    return result
+
+
+def rank(method, pages, reference):
+    """
+    Run `method`, which returns a dictionary of PageRank values, and
+    return its time in seconds and its error against `reference`.
+    """
+    start = time.perf_counter()
+    ranks = method()
+    elapsed = time.perf_counter() - start
+    error = np.array([ranks[page] for page in pages]) - reference
+    return {
+        "seconds": elapsed,
+        "l1_error": float(np.abs(error).sum()),
+        "max_error": float(np.abs(error).max())
+    }
+
+
+def report(result):
+    """
+    Print the timings and errors of one corpus.
+    """
+    print(f"Corpus: {result['pages']} pages, {result['links']} links, "
+          f"{result['dangling']} without links")
+    for name, timing in result["crawl"].items():
+        print(f"  {name:>24} {timing['seconds']:>8.3f}s")
+    if not result["crawl_matches"]:
+        print("  Crawled graph differs from the generated one")
+    for name, timing in result["rank"].items():
+        print(f"  {name:>24} {timing['seconds']:>8.3f}s  "
+              f"L1 error {timing['l1_error']:.2e}  "
+              f"max error {timing['max_error']:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import os
+
+import numpy as np
+
+from crawler import corpus_from_edges
+
+# Exponent of the power law followed by the number of links to a page
+EXPONENT = 2.1
+
+# Average links per page, and the fraction of pages without any
+LINKS = 8
+DANGLING = 0.1
+
+
+def scale_free_graph(n, links=LINKS, exponent=EXPONENT, dangling=DANGLING,
+                     seed=None):
+    """
+    Generate a random link graph of `n` pages whose in-degrees follow a
+    power law with the given `exponent`, as on the web.
+
+    Every page is given a weight, and links point to pages chosen with
+    probability proportional to their weight, so a few hubs collect most
+    of the links. Pages link to `links` others on average (at most once
+    to each page and never to themselves), except for a `dangling`
+    fraction of pages that have no links at all. Links go in every
+    direction, so the graph is full of cycles.
+
+    Return a tuple (pages, sources, targets) like `matrix.edges`, with the
+    pages named so that their sorted order is their numeric order.
+    """
+    rng = np.random.default_rng(seed)
+    width = len(str(max(n - 1, 0)))
+    pages = [f"{i:0{width}d}.html" for i in range(n)]
+
+    # Weights of the Chung-Lu model, shuffled so that hubs are spread out
+    weights = np.arange(1, n + 1) ** (-1 / (exponent - 1))
+    weights = rng.permutation(weights / weights.sum())
+
+    degree = rng.poisson(links / (1 - dangling), size=n)
+    degree[rng.random(n) < dangling] = 0
+    sources = np.repeat(np.arange(n), degree)
+    targets = rng.choice(n, size=len(sources), p=weights)
+
+    # Drop links to the page itself and repeated links
+    keys = np.unique(sources * n + targets)
+    sources, targets = keys // n, keys % n
+    inside = sources != targets
+    return pages, sources[inside], targets[inside]
+
+
+def write_html(directory, pages, sources, targets):
+    """
+    Write the graph as a corpus of HTML files in `directory`, one per
+    page, that `crawl` reads back as the same graph.
+    """
+    os.makedirs(directory, exist_ok=True)
+    bounds = np.searchsorted(sources, np.arange(len(pages) + 1))
+    for i, page in enumerate(pages):
+        with open(os.path.join(directory, page), "w", encoding="utf-8") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<head>\n"
+                    f"<title>{page}</title>\n</head>\n<body>\n"
+                    f"<h1>{page}</h1>\n<ul>\n")
+            for j in targets[bounds[i]:bounds[i + 1]].tolist():
+                f.write(f'<li><a href="{pages[j]}">{pages[j]}</a></li>\n')
+            f.write("</ul>\n</body>\n</html>\n")
+
+
+def write_edges(prefix, pages, sources, targets):
+    """
+    Write the graph in the format of `crawler.crawl_to_edges`, to be read
+    back with `crawler.load_edges`.
+    """
+    with open(prefix + ".pages", "w", encoding="utf-8") as f:
+        for page in pages:
+            f.write(page + "\n")
+    pairs = np.stack([sources, targets], axis=1).astype("<i4")
+    with open(prefix + ".edges", "wb") as f:
+        f.write(pairs.tobytes())
+
+
+def scale_free_corpus(n, links=LINKS, exponent=EXPONENT, dangling=DANGLING,
+                      seed=None):
+    """
+    Return a corpus dictionary like `crawl` for a graph generated by
+    `scale_free_graph`.
+    """
+    return corpus_from_edges(
+        *scale_free_graph(n, links, exponent, dangling, seed)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a scale-free web graph for PageRank."
+    )
+    parser.add_argument("pages", type=int, help="number of pages")
+    parser.add_argument("output",
+                        help="directory for HTML pages, or prefix of the "
+                             "edge list files with --edges")
+    parser.add_argument("--edges", action="store_true",
+                        help="write a binary edge list instead of HTML")
+    parser.add_argument("-l", "--links", type=float, default=LINKS,
+                        help="average links per page")
+    parser.add_argument("-e", "--exponent", type=float, default=EXPONENT,
+                        help="power law exponent of the in-degrees")
+    parser.add_argument("-d", "--dangling", type=float, default=DANGLING,
+                        help="fraction of pages without links")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    pages, sources, targets = scale_free_graph(
+        args.pages, args.links, args.exponent, args.dangling, args.seed
+    )
+    if args.edges:
+        write_edges(args.output, pages, sources, targets)
+    else:
+        write_html(args.output, pages, sources, targets)
+    print(f"Wrote {len(pages)} pages and {len(sources)} links "
+          f"to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
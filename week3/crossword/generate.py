@@ -15,6 +15,27 @@ class CrosswordCreator():
             for var in self.crossword.variables
         }
 
+        # Number every word, so that sets of words can be kept as bitsets
+        # in which bit k stands for `self.words[k]`
+        self.words = sorted(self.crossword.words)
+
+        # Bitset of the words of each length, and of those with each
+        # letter at each position: self.index[length, position][letter]
+        self.lengths = dict()
+        self.index = dict()
+        for k, word in enumerate(self.words):
+            bit = 1 << k
+            self.lengths[len(word)] = self.lengths.get(len(word), 0) | bit
+            for position, letter in enumerate(word):
+                letters = self.index.setdefault((len(word), position), dict())
+                letters[letter] = letters.get(letter, 0) | bit
+
+        # Domains as bitsets, kept in step with `self.domains`
+        self.bits = {
+            var: (1 << len(self.words)) - 1
+            for var in self.crossword.variables
+        }
+
     def letter_grid(self, assignment):
         """
         Return 2D array representing a given assignment.
@@ -108,7 +129,16 @@ class CrosswordCreator():
                     to_stay.add(word)
 
             self.domains[var] = to_stay
+            self.bits[var] = self.lengths.get(var.length, 0)
 
+    def words_in(self, bits):
+        """
+        Return the list of words whose bits are set in the bitset `bits`.
+        """
+        return [
+            self.words[k]
+            for k, bit in enumerate(reversed(bin(bits)[2:])) if bit == "1"
+        ]
 
     def revise(self, x, y):
         """
@@ -119,32 +149,34 @@ class CrosswordCreator():
         Return True if a revision was made to the domain of `x`; return
         False if no revision was made.
         """
-        # Initialize revised
-        revised = False
-
-        # Over lapping points of two variable
         i, j = self.crossword.overlaps[x, y]
-        
-        # Check if words consistent with overlap and remove accordingly
-        domainsX = self.domains[x].copy()
-        
-        for xword in domainsX:
-
-            stays = False
+        y_bits = self.bits[y]
+
+        # Words of x supported by some word of y with the same letter at
+        # the overlap. A word cannot support itself, so if only one word
+        # of y has some letter, that word does not support itself in x.
+        supported = 0
+        x_letters = self.index.get((x.length, i), dict())
+        for letter, y_letter in self.index.get((y.length, j), dict()).items():
+            if letter not in x_letters:
+                continue
+            y_words = y_bits & y_letter
+            if not y_words:
+                continue
+            if y_words.bit_count() == 1:
+                supported |= x_letters[letter] & ~y_words
+            else:
+                supported |= x_letters[letter]
 
-            for yword in self.domains[y]:
-                if xword[i] == yword[j] and xword != yword:
-                    # xword satisfies arc consistency and can stay
-                    stays = True
-                    break
-                
-            if not stays:
-                self.domains[x].remove(xword)
-                revised = True
+        x_bits = self.bits[x]
+        removed = x_bits & ~supported
+        if not removed:
+            return False
 
-        return revised
+        self.bits[x] = x_bits & supported
+        self.domains[x].difference_update(self.words_in(removed))
+        return True
 
-        
     def ac3(self, arcs=None):
         """
         Update `self.domains` such that each variable is arc consistent.